@@ -1,22 +1,20 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+from robustpca.tables import load_table
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 # --- Load data ---
-df = pd.read_csv(os.path.join(BASE, "clean_weekly_with_100k.csv"), encoding="cp1252")
-df["date"] = pd.to_datetime(df["date"])
+df = load_table(os.path.join(BASE, "clean_weekly_with_100k.csv"))
 
 # PCP low-rank cases per 100k (continents)
-L_cont = pd.read_csv(
-    os.path.join(BASE, "rpca_continent_cases_per100k_lowrank.csv"),
-    index_col=0, parse_dates=True
-)
+L_cont = read_frame(os.path.join(BASE, "rpca_continent_cases_per100k_lowrank.csv"))
 
 # --- Build continent-level vaccination series (PfV per 100) ---
 # average PfV per 100 over countries in each continent for each date
-vax_cont = (df.groupby(["date", "continent"])["pfv_per_hundred"]
+vax_cont = (df.groupby(["date", "continent"], observed=True)["pfv_per_hundred"]
               .mean()
               .unstack("continent")
               .sort_index())
@@ -1,19 +1,19 @@
 # ===== RPCA plots for continents =====
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+from robustpca.sparse_io import read_sparse_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 M_path = os.path.join(BASE, "rpca_continent_cases_per100k_matrix.csv")
 L_path = os.path.join(BASE, "rpca_continent_cases_per100k_lowrank.csv")
 S_path = os.path.join(BASE, "rpca_continent_cases_per100k_sparse.csv")
 
-M = pd.read_csv(M_path, index_col=0, parse_dates=True)
-L = pd.read_csv(L_path, index_col=0, parse_dates=True)
-S = pd.read_csv(S_path, index_col=0, parse_dates=True)
-
-# ensure same column order and date index
+M = read_frame(M_path)
+L = read_frame(L_path)
+S = read_sparse_frame(S_path, M.index, M.columns)   # ensure same column order and date index
 cols = [c for c in M.columns if c in L.columns and c in S.columns]
 M, L, S = M[cols], L[cols], S[cols]
 M = M.sort_index(); L = L.sort_index(); S = S.sort_index()
@@ -1,14 +1,15 @@
 # ===== Compare RPCA methods for continents =====
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import container_current, read_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 # --- Helper to load if exists ---
 def load_if_exists(path):
-    if os.path.exists(path):
-        return pd.read_csv(path, index_col=0, parse_dates=True)
+    if container_current(path) or os.path.exists(path):
+        return read_frame(path)
     else:
         print(f"⚠️  Missing file, skipping: {os.path.basename(path)}")
         return None
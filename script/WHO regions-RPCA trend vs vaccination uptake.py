@@ -1,20 +1,18 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+from robustpca.tables import load_table
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 # Load data
-df = pd.read_csv(os.path.join(BASE, "clean_weekly_with_100k.csv"), encoding="cp1252")
-df["date"] = pd.to_datetime(df["date"])
+df = load_table(os.path.join(BASE, "clean_weekly_with_100k.csv"))
 
-L_who = pd.read_csv(
-    os.path.join(BASE, "rpca_who_cases_per100k_lowrank.csv"),
-    index_col=0, parse_dates=True
-)
+L_who = read_frame(os.path.join(BASE, "rpca_who_cases_per100k_lowrank.csv"))
 
 # Build WHO-region vaccination time series
-vax_who = (df.groupby(["date", "who_region"])["pfv_per_hundred"]
+vax_who = (df.groupby(["date", "who_region"], observed=True)["pfv_per_hundred"]
              .mean()
              .unstack("who_region")
              .sort_index())
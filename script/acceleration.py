@@ -0,0 +1,148 @@
+import numpy as np
+
+MU_SCHEDULES = ("geometric", "balanced")
+EXTRAPOLATIONS = (None, "nesterov", "anderson")
+
+
+class Acceleration:
+    """
+    Penalty schedule and (S, Y) extrapolation for the IALM loops of pcp()
+    and irls_rpca(). L is a function of (S, Y), so extrapolating those two
+    extrapolates the whole iterate.
+
+    mu_schedule:
+        "geometric"  mu <- min(rho * mu, mu_bar) every iteration; the loop
+                     stops on the primal residual alone (classic IALM).
+                     Converges in a few dozen iterations but mu grows so
+                     fast that the iterate can freeze short of the optimum.
+        "balanced"   residual balancing (Boyd et al. 2011, sec. 3.4.1):
+                     mu is multiplied (divided) by tau when the primal
+                     residual ||M - L - S|| is more than eta times the dual
+                     residual mu ||S - S_prev|| (or vice versa); the loop
+                     stops when both are below tol.
+    extrapolation:
+        None
+        "nesterov"   fast ADMM with restart (Goldstein et al. 2014).
+        "anderson"   type-II Anderson mixing over the last `memory`
+                     iterates; the history is dropped whenever mu changes,
+                     so it only acts with the "balanced" schedule.
+    """
+
+    def __init__(self, shape, dtype=np.float64, mu_schedule="geometric", extrapolation=None,
+                 rho=1.5, mu_bar=np.inf, eta=10.0, tau=2.0, memory=5, restart=0.999):
+        if mu_schedule not in MU_SCHEDULES:
+            raise ValueError(f"Unknown mu_schedule {mu_schedule!r}; expected one of {MU_SCHEDULES}")
+        if extrapolation not in EXTRAPOLATIONS:
+            raise ValueError(
+                f"Unknown extrapolation {extrapolation!r}; expected one of {EXTRAPOLATIONS}")
+        self.mu_schedule = mu_schedule
+        self.extrapolation = extrapolation
+        self.rho = rho
+        self.mu_bar = mu_bar
+        self.eta = eta
+        self.tau = tau
+        self.memory = memory
+        self.restart = restart
+
+        # step inputs; only needed when they differ from the iterates or
+        # when the dual residual is tracked
+        self._copy_inputs = extrapolation is not None or mu_schedule == "balanced"
+        if self._copy_inputs:
+            self.S_in = np.zeros(shape, dtype=dtype)
+            self.Y_in = np.zeros(shape, dtype=dtype)
+            self._D = np.empty(shape, dtype=dtype)
+        self._first = True
+        if extrapolation == "nesterov":
+            self._S_old = np.empty(shape, dtype=dtype)
+            self._Y_old = np.empty(shape, dtype=dtype)
+            self._alpha = 1.0
+            self._c_old = np.inf
+        self._history = []
+        self._last = None
+
+    def point(self, S, Y, mu):
+        """
+        (S, Y) to feed into the next iteration.
+        """
+        if not self._copy_inputs:
+            return S, Y
+        if self._first or self.extrapolation is None:
+            self._first = False
+            np.copyto(self.S_in, S)
+            np.copyto(self.Y_in, Y)
+            if self.extrapolation == "nesterov":
+                np.copyto(self._S_old, S)
+                np.copyto(self._Y_old, Y)
+            return self.S_in, self.Y_in
+        if self.extrapolation == "nesterov":
+            self._nesterov(S, Y, mu)
+        else:
+            self._anderson(S, Y)
+        return self.S_in, self.Y_in
+
+    def _nesterov(self, S, Y, mu):
+        c = (np.linalg.norm(np.subtract(Y, self.Y_in, out=self._D)) ** 2 / mu
+             + mu * np.linalg.norm(np.subtract(S, self.S_in, out=self._D)) ** 2)
+        if c < self.restart * self._c_old:
+            alpha = (1.0 + np.sqrt(1.0 + 4.0 * self._alpha ** 2)) / 2.0
+            beta = (self._alpha - 1.0) / alpha
+            self._alpha, self._c_old = alpha, c
+        else:
+            # momentum restart
+            beta = 0.0
+            self._alpha, self._c_old = 1.0, c / self.restart
+        for new, old, out in ((S, self._S_old, self.S_in), (Y, self._Y_old, self.Y_in)):
+            np.subtract(new, old, out=out)
+            out *= beta
+            out += new
+            np.copyto(old, new)
+
+    def _anderson(self, S, Y):
+        # fixed-point map x = (S_in, Y_in) -> f = (S, Y), residual g = f - x
+        g_S, g_Y = S - self.S_in, Y - self.Y_in
+        np.copyto(self.S_in, S)
+        np.copyto(self.Y_in, Y)
+        if self._last is not None:
+            S_last, Y_last, gS_last, gY_last = self._last
+            self._history.append((S - S_last, Y - Y_last, g_S - gS_last, g_Y - gY_last))
+            del self._history[:-self.memory]
+        self._last = (S.copy(), Y.copy(), g_S, g_Y)
+        if not self._history:
+            return
+
+        dG = [(dgS, dgY) for _, _, dgS, dgY in self._history]
+        gram = np.array([[np.vdot(a[0], b[0]) + np.vdot(a[1], b[1]) for b in dG] for a in dG])
+        rhs = np.array([np.vdot(a[0], g_S) + np.vdot(a[1], g_Y) for a in dG])
+        gram += 1e-10 * (np.trace(gram) + 1e-300) * np.eye(len(dG))
+        gamma = np.linalg.solve(gram, rhs)
+        for c, (dS, dY, _, _) in zip(gamma, self._history):
+            self.S_in -= c * dS
+            self.Y_in -= c * dY
+
+    def dual_residual(self, S, S_in, mu):
+        """
+        mu ||S - S_in||, or 0 when the schedule does not use it.
+        """
+        if self.mu_schedule != "balanced":
+            return 0.0
+        return mu * np.linalg.norm(np.subtract(S, S_in, out=self._D))
+
+    def next_mu(self, mu, primal, dual):
+        """
+        Penalty for the next iteration; primal / dual are None on
+        iterations where the residuals were not measured.
+        """
+        if self.mu_schedule == "geometric":
+            return min(mu * self.rho, self.mu_bar)
+        if primal is None:
+            return mu
+        if primal > self.eta * dual:
+            new_mu = min(mu * self.tau, self.mu_bar)
+        elif dual > self.eta * primal:
+            new_mu = mu / self.tau
+        else:
+            return mu
+        if new_mu != mu and self.extrapolation == "anderson":
+            self._history.clear()
+            self._last = None
+        return new_mu
@@ -0,0 +1,117 @@
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from robustpca.decomposition_io import load_decomposition
+from robustpca import kernels
+from robustpca.kernels import HAVE_NUMBA, sparse_dual_update
+from robustpca.pcp import pcp
+
+SHAPES = [(1000, 50), (2000, 200), (5000, 1000)]
+
+
+def unfused_update(M, L, T, Y_in, mu, lam, S, Y, X):
+    # the S / residual / dual steps as separate NumPy passes, before fusion
+    np.subtract(M, L, out=X)
+    X += T
+    out = np.abs(X, out=S)
+    out -= lam / mu
+    np.maximum(out, 0.0, out=out)
+    np.copysign(out, X, out=out)
+    np.subtract(M, L, out=T)
+    T -= S
+    res = np.linalg.norm(T)
+    T *= mu
+    np.add(Y_in, T, out=Y)
+    return res * res
+
+
+def time_update(update, M, L, Y_in, mu, lam, repeat):
+    S, Y, X, T = (np.empty_like(M) for _ in range(4))
+    best = np.inf
+    for _ in range(repeat):
+        np.multiply(Y_in, 1.0 / mu, out=T)
+        start = time.perf_counter()
+        update(M, L, T, Y_in, mu, lam, S, Y, X)
+        best = min(best, time.perf_counter() - start)
+    return best, S, Y
+
+
+def benchmark_kernel(shape, repeat=20, seed=0):
+    """
+    Time one S / residual / dual update on random n x m data, unfused
+    against sparse_dual_update (best of `repeat`), and check they agree.
+    """
+    rng = np.random.default_rng(seed)
+    M, L, Y_in = (rng.standard_normal(shape) for _ in range(3))
+    mu, lam = 1.7, 1.0 / np.sqrt(max(shape))
+    fused = lambda *a: sparse_dual_update(*a, want_norm=True)
+    t_old, S_old, Y_old = time_update(unfused_update, M, L, Y_in, mu, lam, repeat)
+    t_new, S_new, Y_new = time_update(fused, M, L, Y_in, mu, lam, repeat)
+    return dict(
+        case=f"kernel {shape[0]}x{shape[1]}",
+        unfused_s=t_old,
+        fused_s=t_new,
+        speedup=t_old / t_new,
+        max_diff=max(np.abs(S_old - S_new).max(), np.abs(Y_old - Y_new).max()),
+    )
+
+
+def check_paths(shape, seed=0):
+    """
+    With Numba installed: the compiled kernels against their NumPy
+    fallbacks on random n x m data, without and with a mask (and NaN in M
+    under it). Returns the largest differences in S, Y, ||R||^2 (relative)
+    and soft_threshold.
+    """
+    rng = np.random.default_rng(seed)
+    M, L, Y_in = (rng.standard_normal(shape) for _ in range(3))
+    mu, lam = 1.7, 1.0 / np.sqrt(max(shape))
+    missing = rng.random(shape) < 0.2
+    rows = []
+    for mask in (None, missing):
+        M_in = M.copy()
+        if mask is not None:
+            M_in[mask] = np.nan
+        out = {}
+        for name, update in (("numpy", kernels._sparse_dual_update_numpy),
+                             ("numba", sparse_dual_update)):
+            S, Y, X = (np.empty_like(M) for _ in range(3))
+            T = Y_in / mu
+            res2 = update(np.nan_to_num(M_in), L, T, Y_in, mu, lam, S, Y, X, mask, True)
+            out[name] = S, Y, T, res2
+        (S0, Y0, T0, r0), (S1, Y1, T1, r1) = out["numpy"], out["numba"]
+        thr0 = kernels._soft_threshold_numpy(M_in, lam)
+        thr1 = kernels.soft_threshold(M_in, lam)
+        rows.append(dict(
+            case=f"paths {shape[0]}x{shape[1]}" + ("" if mask is None else " masked"),
+            max_diff=max(np.abs(S0 - S1).max(), np.abs(Y0 - Y1).max(),
+                         np.abs(T0 - T1).max()),
+            res2_rel_diff=abs(r0 - r1) / r0,
+            threshold_diff=np.abs(thr0 - thr1).max(),
+        ))
+    return rows
+
+
+def benchmark_pcp(path):
+    # end to end: pcp wall time on the date×group matrix of one container
+    M = load_decomposition(path, mmap=False).M
+    start = time.perf_counter()
+    pcp(M)
+    return dict(case=f"pcp {os.path.basename(path)}", fused_s=time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"numba available: {HAVE_NUMBA}")
+    rows = [benchmark_kernel(shape) for shape in SHAPES]
+    if HAVE_NUMBA:
+        rows += [row for shape in SHAPES for row in check_paths(shape)]
+    rows += [benchmark_pcp(path) for path in sorted(glob.glob("rpca_*_mls.npz"))]
+    table = pd.DataFrame(rows)
+    pd.set_option("display.width", 160)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+    table.to_csv("kernel_benchmark.csv", index=False)
+    print("Saved kernel_benchmark.csv")
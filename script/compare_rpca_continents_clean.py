@@ -1,12 +1,13 @@
 # compare_rpca_continents_clean.py
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 def load(path):
-    return pd.read_csv(path, index_col=0, parse_dates=True)
+    return read_frame(path)
 
 M      = load(os.path.join(BASE, "rpca_continent_cases_per100k_matrix.csv"))
 L_pcp  = load(os.path.join(BASE, "rpca_continent_cases_per100k_lowrank.csv"))
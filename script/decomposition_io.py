@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import struct
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from .sparse_io import to_sparse
+
+PARTS = ("matrix", "lowrank", "sparse")
+
+_PART_ARRAYS = {"matrix": "M", "lowrank": "L", "sparse": "S"}
+_PART_SUFFIX = re.compile(r"_(matrix|lowrank|sparse)\.csv$")
+
+
+def container_path(prefix):
+    """
+    Container of the decomposition <prefix> (e.g. BASE/rpca_continent_cases):
+    <prefix>_mls.npz. A *_matrix.csv / *_lowrank.csv / *_sparse.csv export
+    path maps to the container it was exported from.
+    """
+    m = _PART_SUFFIX.search(prefix)
+    if m is not None:
+        prefix = prefix[:m.start()]
+    return prefix + "_mls.npz"
+
+
+def container_current(csv_path):
+    """
+    True if the container of csv_path (see container_path) exists and is
+    not older than csv_path itself.
+    """
+    path = container_path(csv_path)
+    if not os.path.exists(path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+def _label_array(labels):
+    # datetime and numeric labels keep their dtype (no parsing on load),
+    # anything else is stored as text
+    labels = pd.Index(labels)
+    if isinstance(labels, pd.DatetimeIndex) or pd.api.types.is_numeric_dtype(labels):
+        return labels.to_numpy()
+    return np.asarray(labels.astype(str), dtype=str)
+
+
+class Decomposition:
+    """
+    M, L, S of one decomposition M = L + S (+ noise) as dense arrays with
+    their shared index / columns and the run metadata (a JSON-able dict:
+    solver, parameters, ...). S may be given as anything to_sparse()
+    accepts.
+    """
+
+    def __init__(self, M, L, S, index=None, columns=None, meta=None):
+        if not isinstance(S, np.ndarray):
+            S = to_sparse(S).toarray()
+        self.M, self.L, self.S = M, L, S
+        if not M.shape == L.shape == S.shape:
+            raise ValueError(f"Shapes of M, L and S differ: {M.shape}, {L.shape}, {S.shape}")
+        self.index = pd.RangeIndex(M.shape[0]) if index is None else pd.Index(index)
+        self.columns = pd.RangeIndex(M.shape[1]) if columns is None else pd.Index(columns)
+        self.meta = dict(meta or {})
+
+    @property
+    def shape(self):
+        return self.M.shape
+
+    def frame(self, part):
+        """
+        One part ("matrix", "lowrank" or "sparse") as a labelled DataFrame,
+        copied into memory (it does not keep the file mapped).
+        """
+        if part not in _PART_ARRAYS:
+            raise ValueError(f"Unknown part {part!r}; expected one of {list(PARTS)}")
+        values = np.array(getattr(self, _PART_ARRAYS[part]))
+        return pd.DataFrame(values, index=self.index, columns=self.columns)
+
+    def save(self, path):
+        """
+        One uncompressed .npz: M, L, S as C-contiguous float64, the labels
+        and the metadata as JSON. Uncompressed, so load_decomposition() can
+        memory-map the arrays. The file is replaced atomically, so readers
+        never see a partly written container.
+        """
+        # per-process temporary name (not mkstemp: its 0600 mode would stick)
+        tmp = f"{os.path.splitext(path)[0]}.{os.getpid()}.tmp.npz"
+        try:
+            self._write(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _write(self, path):
+        np.savez(
+            path,
+            M=np.ascontiguousarray(self.M, dtype=float),
+            L=np.ascontiguousarray(self.L, dtype=float),
+            S=np.ascontiguousarray(self.S, dtype=float),
+            index=_label_array(self.index),
+            columns=_label_array(self.columns),
+            names=np.asarray(json.dumps([self.index.name, self.columns.name])),
+            meta=np.asarray(json.dumps(self.meta, default=lambda x: x.item())),
+        )
+
+    def export_csv(self, prefix):
+        """
+        The three CSVs of the older scripts, <prefix>_matrix.csv,
+        <prefix>_lowrank.csv and <prefix>_sparse.csv. Returns their paths.
+        """
+        paths = []
+        for part in PARTS:
+            paths.append(f"{prefix}_{part}.csv")
+            self.frame(part).to_csv(paths[-1])
+        return paths
+
+
+def save_decomposition(prefix, M, L, S, index=None, columns=None, meta=None, export_csv=False):
+    """
+    Save M, L, S of one decomposition to container_path(prefix) (see
+    Decomposition.save), and with export_csv=True also as the three CSVs.
+    prefix may also be one of those CSV paths. Returns the container path.
+    """
+    dec = Decomposition(M, L, S, index, columns, meta)
+    path = container_path(prefix)
+    dec.save(path)
+    if export_csv:
+        dec.export_csv(path[:-len("_mls.npz")])
+    return path
+
+
+def _member_memmap(path, info):
+    # an uncompressed .npy member of the zip, mapped in place: skip the
+    # member's local file header, then the .npy header
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        local = f.read(30)
+        if local[:4] != b"PK\x03\x04":
+            raise ValueError(f"Bad zip member header for {info.filename} in {path}")
+        name_len, extra_len = struct.unpack("<HH", local[26:30])
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran else "C")
+
+
+def load_decomposition(path, mmap=True):
+    """
+    Read a container written by Decomposition.save(). With mmap=True
+    (default) M, L and S are read-only memory maps into the file, so
+    reading one column or date range touches only those pages; mmap=False
+    loads them into memory.
+    """
+    arrays = {}
+    with np.load(path, allow_pickle=False) as f:
+        if not mmap:
+            arrays = {name: f[name] for name in ("M", "L", "S")}
+        index_name, columns_name = json.loads(str(f["names"]))
+        index = pd.Index(f["index"], name=index_name)
+        columns = pd.Index(f["columns"], name=columns_name)
+        meta = json.loads(str(f["meta"]))
+    if mmap:
+        with zipfile.ZipFile(path) as z:
+            for name in ("M", "L", "S"):
+                info = z.getinfo(name + ".npy")
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError(f"{name} in {path} is compressed; use mmap=False")
+                arrays[name] = _member_memmap(path, info)
+    return Decomposition(arrays["M"], arrays["L"], arrays["S"], index, columns, meta)
+
+
+def read_frame(csv_path):
+    """
+    One part of a decomposition saved as csv_path (*_matrix.csv,
+    *_lowrank.csv or *_sparse.csv): read it from its container (see
+    container_path) unless a newer CSV of that name exists, else parse the
+    CSV.
+    """
+    m = _PART_SUFFIX.search(csv_path)
+    if m is not None and container_current(csv_path):
+        return load_decomposition(container_path(csv_path)).frame(m.group(1))
+    return pd.read_csv(csv_path, index_col=0, parse_dates=True)
+
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from .pivots import build_matrix
+from .resample import period_start
+
+KEYS = ("country", "date")
+
+
+def _concat(frames):
+    # concat that keeps categorical columns categorical when the frames
+    # carry different categories
+    cats = [c for c in frames[0].columns if isinstance(frames[0][c].dtype, pd.CategoricalDtype)]
+    out = pd.concat(frames, ignore_index=True)
+    for c in cats:
+        if not isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype("category")
+    return out
+
+
+def _key_index(df, keys):
+    # row keys as a MultiIndex comparable across frames (categoricals with
+    # different categories included)
+    return pd.MultiIndex.from_frame(df[list(keys)].astype(object))
+
+
+def _same(a, b):
+    # elementwise equality with NaN == NaN
+    a, b = np.asarray(a), np.asarray(b)
+    same = a == b
+    if a.dtype.kind == "f" or b.dtype.kind == "f":
+        same |= pd.isna(a) & pd.isna(b)
+    return same
+
+
+def merge_rows(store, new, keys=KEYS):
+    """
+    Merge a batch of new daily rows into the cleaned store: rows whose keys
+    (country, date) are already in the store replace them in place, the
+    others are appended; nothing is ever removed. Returns (merged, changed),
+    changed being the rows of the batch that were missing from the store or
+    differ from it (re-sent identical rows are not changes).
+    """
+    keys = list(keys)
+    new = new.drop_duplicates(keys, keep="last")
+    new = new[store.columns]
+    pos = _key_index(store, keys).get_indexer(_key_index(new, keys))
+    known = pos >= 0
+
+    differs = ~known
+    for c in store.columns.difference(keys):
+        differs[known] |= ~_same(store[c].to_numpy()[pos[known]], new[c].to_numpy()[known])
+    changed = new[differs].reset_index(drop=True)
+
+    merged = store.copy()
+    revised = known & differs
+    if revised.any():
+        rows = merged.index[pos[revised]]
+        for c in store.columns:
+            col = new[c][revised]
+            if isinstance(merged[c].dtype, pd.CategoricalDtype):
+                merged[c] = merged[c].cat.add_categories(
+                    pd.Index(col.unique()).difference(merged[c].cat.categories))
+            merged.loc[rows, c] = col.to_numpy()
+    merged = _concat([merged, new[~known]])
+    return merged, changed
+
+
+def dirty_periods(changed, by, freq="W", anchor="MON", date_col="date", period_col="week"):
+    """
+    The (by..., period) groups touched by the changed rows, with periods as
+    in resample(): the only groups of the resampled table to recompute.
+    """
+    keys = list(by) + [period_col]
+    dirty = changed.assign(**{period_col: period_start(changed[date_col], freq, anchor)})
+    return dirty[keys].drop_duplicates().reset_index(drop=True)
+
+
+def _rows_in(df, dirty):
+    # boolean mask of the rows of df whose key columns match a row of dirty
+    return _key_index(df, dirty.columns).isin(_key_index(dirty, dirty.columns))
+
+
+def update_periods(table, daily, dirty, rules, freq="W", anchor="MON", date_col="date",
+                   period_col="week"):
+    """
+    Bring a resampled table (the output of resample(daily_before, by,
+    rules, ...)) up to date with the merged daily store by recomputing only
+    its dirty groups (see dirty_periods) from the daily rows that fall into
+    them; all other rows are kept as they are. Returns the table sorted by
+    its keys, like resample().
+    """
+    keys = list(dirty.columns)
+    daily = daily.assign(**{period_col: period_start(daily[date_col], freq, anchor)})
+    fresh = (daily[_rows_in(daily, dirty)]
+             .groupby(keys, as_index=False, observed=True)
+             .agg(rules))
+    out = _concat([table[~_rows_in(table, dirty)], fresh])
+    return out.sort_values(keys, kind="stable").reset_index(drop=True)
+
+
+def update_matrix(mat, table, dirty, group_col, value_col="new_cases_per_100k",
+                  aggfunc="mean", period_col="week"):
+    """
+    Bring a period x group pivot of table (as built by the pipelines with
+    pivot_table(index=period_col, columns=group_col, values=value_col,
+    aggfunc=aggfunc)) up to date after update_periods(): only the rows of
+    the dirty periods are recomputed, new periods and groups are added.
+
+    Returns (mat, changed_rows), changed_rows being the positions of the
+    recomputed rows in the new mat; pass them on to the decomposition
+    (e.g. IALMState.extend(M, changed=changed_rows)).
+    """
+    periods = pd.Index(dirty[period_col].unique())
+    fresh = build_matrix(table[table[period_col].isin(periods)], period_col, group_col,
+                         value_col, aggfunc)
+    fresh.columns = fresh.columns.astype(object)
+    index = mat.index.union(fresh.index)
+    columns = mat.columns.union(fresh.columns)
+    mat = mat.reindex(index=index, columns=columns)
+    mat.loc[fresh.index] = np.nan
+    mat.loc[fresh.index, fresh.columns] = fresh
+    mat.columns.name = group_col
+    return mat, index.get_indexer(fresh.index)
@@ -1,7 +1,14 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import scipy as sp
 import scipy.linalg
 
+from .kernels import soft_threshold
+from .pcp import _observed, precision_tol
+from .result import RPCAResult
+from .stopping import Exact, Residual, criterion
+from .svd import truncated_svd
 from .utils import time_printer
 
 
@@ -9,12 +16,143 @@ def thresholding(mat: np.ndarray, threshold: float) -> np.ndarray:
     # new_mat = np.copy(mat)
     # new_mat[np.abs(new_mat) < threshold] = 0
     # return new_mat
-    return np.sign(mat) * np.maximum(np.abs(mat) - threshold, np.zeros(mat.shape))
+    # NaN (unobserved) entries are left out of the sparse part
+    return soft_threshold(mat, float(threshold))
+
+
+def best_approximator(mat: np.ndarray, rank: float, svd_method: str = "auto") -> np.ndarray:
+    U, s, V = truncated_svd(mat, int(rank), method=svd_method)
+    return (U * s) @ V
+
+
+def _rng(random_state):
+    # None keeps drawing from the global np.random state, so np.random.seed
+    # still controls unseeded runs
+    if random_state is None or random_state is np.random:
+        return np.random
+    return np.random.default_rng(random_state)
+
+
+class CURLowRank:
+    """
+    Low-rank component kept as CUR factors, L = C @ U_pinv @ R, together
+    with the threshold of the last iteration so the sparse part can be
+    rebuilt on request.
+    """
+
+    def __init__(self, C, U_pinv, R, threshold=0.0):
+        self.C = C
+        self.U_pinv = U_pinv
+        self.R = R
+        self.threshold = threshold
+
+    @property
+    def shape(self):
+        return self.C.shape[0], self.R.shape[1]
+
+    def rows(self, I):
+        return (self.C[I] @ self.U_pinv) @ self.R
+
+    def cols(self, J):
+        return self.C @ (self.U_pinv @ self.R[:, J])
+
+    def block(self, rows=slice(None), cols=slice(None)):
+        return (self.C[rows] @ self.U_pinv) @ self.R[:, cols]
+
+    def to_dense(self):
+        return self.C @ (self.U_pinv @ self.R)
+
+    def sparse(self, data_mat, rows=None):
+        if rows is None:
+            return thresholding(data_mat - self.to_dense(), self.threshold)
+        return thresholding(data_mat[rows] - self.rows(rows), self.threshold)
+
+    def sparse_block(self, data_mat, rows=slice(None), cols=slice(None)):
+        return thresholding(data_mat[rows][:, cols] - self.block(rows, cols), self.threshold)
+
+
+class IRCURState:
+    """
+    Resumable IRCUR iterate: the threshold position it (threshold =
+    thresholding_decay ** it * initial_threshold), the CUR factors, the
+    last samples I, J and, for the dense mode, the full L and S.
+    """
+
+    def __init__(self, it, L_cur, I, J, L=None, S=None):
+        self.it = it
+        self.L_cur = L_cur
+        self.I = I
+        self.J = J
+        self.L = L
+        self.S = S
+
+    def save(self, path):
+        arrays = dict(it=self.it, C=self.L_cur.C, U_pinv=self.L_cur.U_pinv, R=self.L_cur.R,
+                      threshold=self.L_cur.threshold, I=self.I, J=self.J)
+        if self.L is not None:
+            arrays.update(L=self.L, S=self.S)
+        np.savez(path, **arrays)
 
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            L_cur = CURLowRank(f["C"], f["U_pinv"], f["R"], float(f["threshold"]))
+            return cls(int(f["it"]), L_cur, f["I"], f["J"],
+                       f["L"] if "L" in f else None, f["S"] if "S" in f else None)
 
-def best_approximator(mat: np.ndarray, rank: float) -> np.ndarray:
-    U, s, V = sp.linalg.svd(mat, full_matrices=False)
-    return U[:, :rank] @ np.diag(s[:rank]) @ V[:rank, :]
+    def extend(self, data_mat):
+        """
+        State for data_mat whose leading rows are the matrix this state was
+        computed on. New rows enter C with no sparse part, so their low-rank
+        part starts as C_new @ U_pinv @ R.
+        """
+        n_old = self.L_cur.C.shape[0]
+        n, m = data_mat.shape
+        if m != self.L_cur.R.shape[1] or n < n_old:
+            raise ValueError(f"Cannot extend a {self.L_cur.shape} state to {data_mat.shape}")
+        if n == n_old:
+            return self
+        new_rows = np.arange(n_old, n)
+        C = np.vstack([self.L_cur.C, np.nan_to_num(data_mat[new_rows][:, self.J])])
+        L_cur = CURLowRank(C, self.L_cur.U_pinv, self.L_cur.R, self.L_cur.threshold)
+        L = S = None
+        if self.L is not None:
+            L = np.vstack([self.L, L_cur.rows(new_rows)])
+            S = np.vstack([self.S, np.zeros((n - n_old, m))])
+        return IRCURState(self.it, L_cur, self.I, self.J, L, S)
+
+
+def _multistart_run(data_mat, args, kwargs, rng):
+    # one seeded run of IRCUR.decompose_multistart, with its objective on
+    # the observed entries
+    out = IRCUR().decompose(data_mat, *args, random_state=rng, **kwargs)
+    L = out.low_rank.to_dense() if isinstance(out, RPCAResult) else out[0]
+    M, missing = _observed(data_mat, kwargs.get("mask"))
+    R = M - L
+    if missing is not None:
+        R[missing] = 0.0
+    return out, L, np.abs(R).sum() / (np.abs(M).sum() + 1e-12)
+
+
+def _samples(data_mat, I, J, dtype):
+    # sampled rows / columns of M, cast on their own, so a memmap of another
+    # dtype is never copied whole
+    return (np.asarray(data_mat[I, :], dtype=dtype), np.asarray(data_mat[:, J], dtype=dtype))
+
+
+def _sampled_blocks(data_mat, mask, I, J, L_cur, dtype=np.float64):
+    # sampled rows / columns of M and of the current L; unobserved entries
+    # of M (mask False, or NaN) are taken from L, so they carry no sparse
+    # part. Only the sampled blocks are read, so data_mat may be a memmap.
+    M_I, M_J = _samples(data_mat, I, J, dtype)
+    L_I, L_J = (0.0, 0.0) if L_cur is None else (L_cur.rows(I), L_cur.cols(J))
+    miss_I = np.isnan(M_I) if mask is None else ~mask[I, :]
+    miss_J = np.isnan(M_J) if mask is None else ~mask[:, J]
+    if miss_I.any():
+        M_I = np.where(miss_I, L_I, M_I)
+    if miss_J.any():
+        M_J = np.where(miss_J, L_J, M_J)
+    return M_I, M_J, L_I, L_J
 
 
 class IRCUR:
@@ -23,17 +161,58 @@ class IRCUR:
 
     @staticmethod
     def term_criteria(data_mat, L, S, I, J, tol=1e-3):
-        diff = np.linalg.norm((data_mat - L - S)[I, :], ord="fro") + np.linalg.norm(
-            (data_mat - L - S)[:, J], ord="fro"
-        )
-        diff /= np.linalg.norm((data_mat)[I, :], ord="fro") + np.linalg.norm(
-            (data_mat)[:, J], ord="fro"
-        )
+        return Exact(tol).check(IRCUR._residual(data_mat, L, S, I, J))
 
-        if diff < tol:
-            return True, diff
+    @staticmethod
+    def _residual(data_mat, L, S, I, J, s=None):
+        # residual on the sampled rows I and columns J only
+        M_I, M_J = data_mat[I, :], data_mat[:, J]
+        return IRCUR._sampled_residual(M_I, M_J, L[I, :], L[:, J], S[I, :], S[:, J], s)
+
+    @time_printer
+    def decompose_multistart(self, data_mat, rank, nr, nc, initial_threshold, n_starts=8,
+                             n_jobs=None, random_state=None, **kwargs):
+        """
+        Run n_starts independently seeded decompose() calls (child streams
+        of random_state) on a process pool of n_jobs workers (n_jobs=1 runs
+        them here) and keep the run with the lowest objective
+        ||M - L||_1 / ||M||_1, the L1 misfit of the rank-`rank` part.
+        Remaining keyword arguments go to decompose(); return_state is not
+        supported.
+
+        Returns (out, report). report holds the objective of every run, the
+        index of the best one and the spread across runs: the std of the
+        objectives and the relative distance ||L_k - L_best|| / ||L_best||
+        of every run's low-rank part to the best one. A large spread means
+        nr / nc are too small for a stable answer.
+        """
+        data_mat = np.asarray(data_mat)
+        args = (rank, nr, nc, initial_threshold)
+        rngs = np.random.default_rng(random_state).spawn(n_starts)
+        if n_jobs == 1:
+            runs = [_multistart_run(data_mat, args, kwargs, rng) for rng in rngs]
         else:
-            return False, diff
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [pool.submit(_multistart_run, data_mat, args, kwargs, rng)
+                           for rng in rngs]
+                runs = [f.result() for f in futures]
+
+        objectives = np.array([obj for _, _, obj in runs])
+        best = int(np.argmin(objectives))
+        L_best = runs[best][1]
+        L_spread = np.array([np.linalg.norm(L - L_best) for _, L, _ in runs])
+        report = dict(
+            objectives=objectives,
+            best=best,
+            objective_std=float(objectives.std()),
+            L_spread=L_spread / (np.linalg.norm(L_best) + 1e-12),
+        )
+        return runs[best][0], report
+
+    @staticmethod
+    def _sampled_residual(M_I, M_J, L_I, L_J, S_I, S_J, s=None):
+        ref = np.linalg.norm(M_I, ord="fro") + np.linalg.norm(M_J, ord="fro")
+        return Residual([M_I - L_I - S_I, M_J - L_J - S_J], ref, s)
 
     @time_printer
     def decompose(
@@ -48,20 +227,98 @@ class IRCUR:
         resample=True,
         max_iter=1e4,
         verbose=False,
+        sample_only=False,
+        factored=False,
+        state=None,
+        return_state=False,
+        dtype=np.float64,
+        polish=False,
+        stopping=None,
+        random_state=None,
+        mask=None,
     ):
+        """
+        sample_only=True runs every iteration on the sampled rows I and
+        columns J only: L is kept as CUR factors and S is thresholded on the
+        sampled blocks, so an iteration costs O((nr + nc) * max(n, m) * rank)
+        instead of touching all n * m entries.
+
+        factored=True returns an RPCAResult holding L as CUR factors instead
+        of the dense (L, S) pair. In sample-only mode its S is rebuilt on
+        request from data_mat, so neither L nor S is ever materialized.
+
+        state= resumes from an IRCURState returned with return_state=True
+        (output becomes (out, state)), continuing the threshold schedule
+        where it stopped; data_mat may have rows appended since. max_iter
+        counts the iterations of this call only. A sample-only state has
+        no dense L, S and cannot resume a dense call (ValueError).
+
+        dtype=np.float32 iterates in single precision with tol raised to
+        what float32 resolves; polish=True then continues in float64 from
+        the float32 state down to the requested tol.
+
+        stopping= takes a criterion from stopping.py in place of the exact
+        test on the sampled rows and columns; the residual is built once
+        per check and reused for the log line.
+
+        random_state (seed, SeedSequence or np.random.Generator) drives the
+        row/column sampling, making runs reproducible; None uses the global
+        np.random state.
+
+        mask= (boolean, True where observed; default: the non-NaN entries
+        of data_mat) decomposes a matrix with missing entries: they are
+        refilled from the current L every iteration, so they get no sparse
+        part and L completes them (as in pcp(mask=...)).
+        """
+        rng = _rng(random_state)
+        if polish and np.dtype(dtype) != np.float64:
+            _, state = self.decompose(
+                data_mat, rank, nr, nc, initial_threshold, tol=tol,
+                thresholding_decay=thresholding_decay, resample=resample,
+                max_iter=max_iter, verbose=verbose, sample_only=sample_only,
+                state=state, return_state=True, dtype=dtype, stopping=stopping,
+                random_state=rng, mask=mask,
+            )
+            dtype = np.float64
+        stop = criterion(stopping, precision_tol(tol, dtype))
+        stop.start()
+
+        if sample_only:
+            # cast per sampled block, not the whole (possibly memory-mapped) matrix
+            return self._decompose_sampled(
+                np.asarray(data_mat), rank, nr, nc, initial_threshold, stop,
+                thresholding_decay=thresholding_decay, resample=resample,
+                max_iter=max_iter, verbose=verbose, factored=factored,
+                state=state, return_state=return_state, rng=rng,
+                mask=None if mask is None else np.asarray(mask, dtype=bool), dtype=dtype,
+            )
+        data_mat = np.asarray(data_mat, dtype=dtype)
+        data_mat, missing = _observed(data_mat, mask)
+
         n, m = data_mat.shape
         nr = min(nr, n)
         nc = min(nc, m)
-        L = np.zeros(data_mat.shape)
-        S = np.zeros(data_mat.shape)
-        I = np.random.choice(np.arange(n), nr, replace=True)
-        J = np.random.choice(np.arange(m), nc, replace=True)
-        it = 0
+        if state is None:
+            L = np.zeros_like(data_mat)
+            S = np.zeros_like(data_mat)
+            I = rng.choice(np.arange(n), nr, replace=True)
+            J = rng.choice(np.arange(m), nc, replace=True)
+            it = 0
+        else:
+            if state.L is None:
+                raise ValueError("state comes from a sample_only=True run (no dense L, S); "
+                                 "resume it with sample_only=True")
+            state = state.extend(data_mat)
+            L, S = state.L.astype(data_mat.dtype), state.S.astype(data_mat.dtype)
+            I, J, it = state.I, state.J, state.it
+            L_cur = state.L_cur
+        it0 = it
 
-        while not self.term_criteria(data_mat, L, S, I, J, tol=tol)[0] and it < max_iter:
+        done, diff = stop.check(self._residual(data_mat, L, S, I, J))
+        while not done and it - it0 < max_iter:
             if resample:
-                I = np.random.choice(np.arange(n), nr, replace=True)
-                J = np.random.choice(np.arange(m), nc, replace=True)
+                I = rng.choice(np.arange(n), nr, replace=True)
+                J = rng.choice(np.arange(m), nc, replace=True)
 
             threshold = thresholding_decay ** it * initial_threshold
             S[:, J] = thresholding(data_mat - L, threshold)[:, J]
@@ -69,14 +326,104 @@ class IRCUR:
 
             C = (data_mat - S)[:, J]
             R = (data_mat - S)[I, :]
-            U = best_approximator((data_mat - S)[I, :][:, J], rank)
-            L = C @ sp.linalg.pinv(U) @ R
+            Uc, s, Vc = truncated_svd(R[:, J], int(rank))
+            L_cur = CURLowRank(C, sp.linalg.pinv((Uc * s) @ Vc), R, threshold)
+            L = L_cur.to_dense()
+            if missing is not None:
+                # data_mat is our zero-filled copy; refill the gaps from L
+                np.copyto(data_mat, L, where=missing)
 
+            if stop.due(it - it0):
+                done, diff = stop.check(self._residual(data_mat, L, S, I, J, s))
             it += 1
 
         if verbose:
-            print(
-                f"Iteration: {it}, diff: {self.term_criteria(data_mat, L, S, I, J, tol=tol)[1]}, terminating alg."
-            )
+            print(f"Iteration: {it}, diff: {diff}, terminating alg.")
+
+        if factored:
+            out = RPCAResult.from_dense(L, S) if it == 0 else RPCAResult(L_cur, S=S)
+        else:
+            out = L, S
+        if return_state:
+            L_cur = L_cur if it > 0 else CURLowRank(
+                np.zeros((n, nc)), np.zeros((nc, nr)), np.zeros((nr, m)), initial_threshold)
+            return out, IRCURState(it, L_cur, I, J, L, S)
+        return out
+
+    def _decompose_sampled(
+        self,
+        data_mat,
+        rank,
+        nr,
+        nc,
+        initial_threshold,
+        stop,
+        thresholding_decay=0.65,
+        resample=True,
+        max_iter=1e4,
+        verbose=False,
+        factored=False,
+        state=None,
+        return_state=False,
+        rng=np.random,
+        mask=None,
+        dtype=np.float64,
+    ):
+        n, m = data_mat.shape
+        nr = min(nr, n)
+        nc = min(nc, m)
+        if state is None:
+            I = rng.choice(np.arange(n), nr, replace=True)
+            J = rng.choice(np.arange(m), nc, replace=True)
+            M_I, M_J = _samples(data_mat, I, J, dtype)
+            L_cur = None
+            threshold = initial_threshold
+            done = not (M_I.any() or M_J.any())
+            diff = 0.0 if done else 1.0
+            it = 0
+        else:
+            state = state.extend(data_mat)
+            L_cur, I, J, it = state.L_cur, state.I, state.J, state.it
+            threshold = L_cur.threshold
+            M_I, M_J, L_I, L_J = _sampled_blocks(data_mat, mask, I, J, L_cur, dtype)
+            S_I = thresholding(M_I - L_I, threshold)
+            S_J = thresholding(M_J - L_J, threshold)
+            done, diff = stop.check(self._sampled_residual(M_I, M_J, L_I, L_J, S_I, S_J))
+        it0 = it
 
-        return L, S
+        while not done and it - it0 < max_iter:
+            if resample:
+                I = rng.choice(np.arange(n), nr, replace=True)
+                J = rng.choice(np.arange(m), nc, replace=True)
+
+            threshold = thresholding_decay ** it * initial_threshold
+            M_I, M_J, L_I, L_J = _sampled_blocks(data_mat, mask, I, J, L_cur, dtype)
+            S_I = thresholding(M_I - L_I, threshold)
+            S_J = thresholding(M_J - L_J, threshold)
+
+            C = M_J - S_J
+            R = M_I - S_I
+            Uc, s, Vc = truncated_svd(R[:, J], int(rank))
+            L_cur = CURLowRank(C, sp.linalg.pinv((Uc * s) @ Vc), R, threshold)
+
+            if stop.due(it - it0):
+                done, diff = stop.check(self._sampled_residual(
+                    M_I, M_J, L_cur.rows(I), L_cur.cols(J), S_I, S_J, s))
+            it += 1
+
+        if verbose:
+            print(f"Iteration: {it}, diff: {diff}, terminating alg.")
+
+        if L_cur is None:
+            L_cur = CURLowRank(np.zeros((n, nc)), np.zeros((nc, nr)), np.zeros((nr, m)), threshold)
+        if mask is not None:
+            # NaN marks the unobserved entries, which thresholding leaves out of S
+            data_mat = np.where(mask, data_mat, np.nan)
+        if factored:
+            out = RPCAResult(L_cur, M=data_mat)
+        else:
+            L = L_cur.to_dense()
+            out = L, thresholding(np.asarray(data_mat, dtype=dtype) - L, threshold)
+        if return_state:
+            return out, IRCURState(it, L_cur, I, J)
+        return out
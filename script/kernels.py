@@ -0,0 +1,109 @@
+"""
+Elementwise kernels of the solver loops. With Numba installed they are
+compiled and fused into one multithreaded pass over memory; without it the
+same operations run as in-place NumPy ufunc calls.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # pure NumPy fallback
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+# placeholder passed to the compiled kernels when there is no mask
+_NO_MASK = np.zeros((0, 0), dtype=bool)
+
+
+def _soft_threshold_numpy(X, tau, out=None):
+    out = np.abs(X, out=out)
+    out -= tau
+    # fmax leaves NaN (unobserved) entries at 0
+    np.fmax(out, 0.0, out=out)
+    return np.copysign(out, X, out=out)
+
+
+def _sparse_dual_update_numpy(M, L, T, Y_in, mu, lam, S, Y, X, missing, want_norm):
+    np.subtract(M, L, out=X)
+    X += T
+    _soft_threshold_numpy(X, lam / mu, out=S)
+    if missing is not None:
+        S[missing] = 0.0
+    np.subtract(M, L, out=T)
+    T -= S
+    if missing is not None:
+        T[missing] = 0.0
+    np.multiply(T, mu, out=X)
+    np.add(Y_in, X, out=Y)
+    if want_norm:
+        flat = T.reshape(-1)
+        return float(np.dot(flat, flat))
+    return None
+
+
+if HAVE_NUMBA:
+    @numba.njit(parallel=True, cache=True)
+    def _soft_threshold_numba(X, tau, out):
+        n, m = X.shape
+        for i in numba.prange(n):
+            for j in range(m):
+                x = X[i, j]
+                a = abs(x) - tau
+                out[i, j] = np.copysign(a, x) if a > 0 else 0.0
+        return out
+
+    @numba.njit(parallel=True, cache=True)
+    def _sparse_dual_update_numba(M, L, T, Y_in, mu, lam, S, Y, missing, has_mask):
+        n, m = M.shape
+        tau = lam / mu
+        total = 0.0
+        for i in numba.prange(n):
+            row = 0.0
+            for j in range(m):
+                d = M[i, j] - L[i, j]
+                if has_mask and missing[i, j]:
+                    s = 0.0
+                    r = 0.0
+                else:
+                    x = d + T[i, j]
+                    a = abs(x) - tau
+                    s = np.copysign(a, x) if a > 0 else 0.0
+                    r = d - s
+                S[i, j] = s
+                T[i, j] = r
+                Y[i, j] = Y_in[i, j] + mu * r
+                row += r * r
+            total += row
+        return total
+
+
+def soft_threshold(X, tau, out=None):
+    """
+    Elementwise sign(X) * max(|X| - tau, 0) into out (a new array by
+    default); NaN entries give 0.
+    """
+    if HAVE_NUMBA and X.ndim == 2 and np.isscalar(tau):
+        if out is None:
+            out = np.empty_like(X)
+        return _soft_threshold_numba(X, X.dtype.type(tau), out)
+    return _soft_threshold_numpy(X, tau, out=out)
+
+
+def sparse_dual_update(M, L, T, Y_in, mu, lam, S, Y, X, missing=None, want_norm=False):
+    """
+    The S, residual and dual steps of one IALM iteration, given the new L
+    and T = Y_in / mu:
+        S = shrink(M - L + T, lam / mu)     (0 on missing entries)
+        T = M - L - S                       (the residual R, 0 on missing)
+        Y = Y_in + mu * R
+    Y may be Y_in itself. X is scratch. Returns ||R||_F^2 when want_norm
+    (always free in the fused kernel), else None.
+    """
+    if HAVE_NUMBA:
+        mask = _NO_MASK if missing is None else missing
+        dt = M.dtype.type
+        total = _sparse_dual_update_numba(M, L, T, Y_in, dt(mu), dt(lam), S, Y, mask,
+                                          missing is not None)
+        return float(total) if want_norm else None
+    return _sparse_dual_update_numpy(M, L, T, Y_in, mu, lam, S, Y, X, missing, want_norm)
@@ -0,0 +1,126 @@
+import numpy as np
+
+from .pcp import pcp, shrink
+
+
+class OnlineRPCA:
+    """
+    Online RPCA by stochastic optimization (OR-PCA, Feng, Xu & Yan 2013).
+
+    Each row z (one date across the m groups) is split as z = B @ r + e with
+    an m x rank basis B:
+        min_{r, e} 1/2 ||z - B r - e||^2 + lam1/2 ||r||^2 + lam2 ||e||_1
+    (solved as a Huber regression in r by at most n_inner reweighted ridge
+    steps)
+    after which B is refreshed by one pass of block-coordinate descent on
+    the accumulated statistics A = sum r r^T and C = sum (z - e) r^T.
+    A row costs O(rank * m) for the projection and O(rank^2 * m) for the
+    basis update, independent of how many rows came before.
+
+    Every resync_every rows (if set) the basis is re-synchronised with the
+    batch solver on the last `history` rows; resync() can also be called
+    directly, e.g. to seed the basis from the historical matrix.
+    """
+
+    def __init__(self, n_features, rank=2, lam1=None, lam2=None, n_inner=20,
+                 resync_every=None, history=None, solver=pcp, solver_kwargs=None,
+                 random_state=None):
+        self.n_features = n_features
+        self.rank = rank
+        self.lam1 = 1.0 / np.sqrt(n_features) if lam1 is None else lam1
+        self.lam2 = 1.0 / np.sqrt(n_features) if lam2 is None else lam2
+        self.n_inner = n_inner
+        self.resync_every = resync_every
+        self.history = history
+        self.solver = solver
+        self.solver_kwargs = solver_kwargs or {}
+
+        rng = np.random.default_rng(random_state)
+        self.basis = rng.standard_normal((n_features, rank)) / np.sqrt(n_features)
+        self.A = np.zeros((rank, rank))
+        self.C = np.zeros((n_features, rank))
+        self.n_seen = 0
+        self._buffer = []
+
+    def project(self, z):
+        """
+        Coefficients r and sparse part e of one row for the current basis.
+        """
+        B = self.basis
+        # minimising over e first leaves a Huber regression in r; solve it
+        # by iteratively reweighted ridge regressions (weight 1 on rows with
+        # |residual| <= lam2, lam2 / |residual| on the outliers)
+        ridge = self.lam1 * np.eye(self.rank)
+        r = np.linalg.solve(B.T @ B + ridge, B.T @ z)
+        for _ in range(self.n_inner):
+            w = np.minimum(1.0, self.lam2 / np.maximum(np.abs(z - B @ r), 1e-12))
+            r_new = np.linalg.solve((B.T * w) @ B + ridge, B.T @ (w * z))
+            if np.allclose(r_new, r):
+                r = r_new
+                break
+            r = r_new
+        # e last, so the residual z - B r - e stays within lam2 even when
+        # the loop stopped at n_inner
+        e = shrink(z - B @ r, self.lam2)
+        return r, e
+
+    def _update_basis(self):
+        A = self.A + self.lam1 * np.eye(self.rank)
+        for j in range(self.rank):
+            self.basis[:, j] += (self.C[:, j] - self.basis @ A[:, j]) / A[j, j]
+
+    def partial_fit(self, z):
+        """
+        Consume one row; returns its (low-rank, sparse) parts l, e for the
+        basis before this row's update, so l + e = z up to the lam2
+        shrinkage.
+        """
+        z = np.asarray(z, dtype=float)
+        r, e = self.project(z)
+        # split against the basis r was fitted to, before the update / resync
+        # below replace it
+        l = self.basis @ r
+        self.A += np.outer(r, r)
+        self.C += np.outer(z - e, r)
+        self._update_basis()
+        self.n_seen += 1
+
+        if self.resync_every:
+            self._buffer.append(z)
+            if self.history:
+                del self._buffer[:-self.history]
+            if self.n_seen % self.resync_every == 0:
+                self.resync(np.vstack(self._buffer))
+
+        return l, e
+
+    def fit_rows(self, X):
+        """
+        Stream the rows of X in order; returns the stacked (L, S).
+        """
+        parts = [self.partial_fit(z) for z in X]
+        return np.vstack([p[0] for p in parts]), np.vstack([p[1] for p in parts])
+
+    def resync(self, M):
+        """
+        Re-synchronise with the batch solver: decompose M (recent rows,
+        oldest first), take the leading rank singular directions of its
+        low-rank part as the basis and rebuild the accumulated statistics
+        from M as if its rows had been streamed. Returns the batch (L, S).
+        """
+        L, S = self.solver(M, **self.solver_kwargs)
+        U, s, Vt = np.linalg.svd(L, full_matrices=False)
+        k = min(self.rank, len(s))
+        lam = self.solver_kwargs.get("lam") or 1.0 / np.sqrt(max(M.shape))
+        self.basis = np.zeros((self.n_features, self.rank))
+        # balanced factor L = (U sqrt(c s)) (sqrt(s / c) Vt) with
+        # c = lam1 lam / lam2: projecting a row of M then minimises the batch
+        # objective restricted to that row (ridge a^2 / (2 s) per direction,
+        # as in pcp.l1_project), so the projected rows reproduce L
+        self.basis[:, :k] = Vt[:k].T * np.sqrt(s[:k] * self.lam1 * lam / self.lam2)
+
+        R = np.vstack([self.project(z)[0] for z in M])
+        self.A = R.T @ R
+        self.C = (M - S).T @ R
+        self._buffer = list(M[-self.history:] if self.history else M)
+        return L, S
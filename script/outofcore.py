@@ -0,0 +1,228 @@
+import os
+
+import numpy as np
+
+from .ircur import IRCUR, thresholding
+from .pcp import shrink
+
+# float64 arrays per block column held at once by a PCP pass (M, S, Y, L,
+# X, residual and temporaries, or the stacked block and its QR copy), and
+# k x k arrays held besides (R, its SVD, the projector)
+_PCP_COLUMN_ARRAYS = 10
+_PCP_SQUARE_ARRAYS = 6
+# arrays of the size of the sampled blocks (nr x m and n x nc) held by an
+# IRCUR iteration
+_IRCUR_SAMPLE_ARRAYS = 7
+
+
+def open_matrix(M):
+    # a path to a .npy file is opened as a read-only memmap
+    if isinstance(M, (str, os.PathLike)):
+        return np.load(M, mmap_mode="r")
+    return M
+
+
+def block_width(n, memory_budget, arrays_per_column, fixed_bytes=0):
+    """
+    Columns per block so that arrays_per_column float64 arrays of n x width
+    plus fixed_bytes fit into memory_budget bytes.
+    """
+    width = (memory_budget - fixed_bytes) // (arrays_per_column * 8 * n)
+    if width < 1:
+        raise ValueError(f"memory_budget={memory_budget} bytes is too small for "
+                         f"{n}-row blocks (need > {fixed_bytes + arrays_per_column * 8 * n})")
+    return int(width)
+
+
+def _blocks(m, width):
+    return [slice(j, min(j + width, m)) for j in range(0, m, width)]
+
+
+def tsqr_r(blocks):
+    """
+    R factor of the tall matrix formed by stacking the given row blocks,
+    accumulated one block at a time (tall-skinny QR): only R and the current
+    block are ever held in memory.
+    """
+    R = None
+    for B in blocks:
+        R = _tsqr_update(R, B)
+    return R
+
+
+def _tsqr_update(R, B):
+    # R factor of [R; B]
+    return np.linalg.qr(B if R is None else np.vstack([R, B]), mode="r")
+
+
+def _left_svd(R):
+    # X = R^T Q^T for X^T = Q R, so the SVD R = Ur diag(s) Vr^T gives X's left
+    # singular vectors Vr and singular values s
+    _, s, Vr_t = np.linalg.svd(R, full_matrices=False)
+    return Vr_t.T, s
+
+
+def _output(out_dir, name, shape, transpose):
+    A = np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+",
+                                  dtype=np.float64, shape=shape)
+    return A.T if transpose else A
+
+
+def pcp_out_of_core(M, out_dir, lam=None, mu=None, max_iter=1000, tol=1e-7, rho=1.5,
+                    memory_budget=2 ** 30, verbose=False):
+    """
+    pcp() for matrices larger than RAM. M is a path to a .npy file (or any
+    array, e.g. an np.memmap) and is only read in blocks of columns along
+    its long side; L, S and the dual Y live in L.npy, S.npy and Y.npy under
+    out_dir and are streamed block by block as well. Blocks are sized so
+    the peak memory stays around memory_budget bytes, which also has to
+    hold a few min(n, m)^2 matrices.
+
+    Each IALM iteration makes two passes over the blocks: one accumulating
+    the R factor of X^T = (M - S + Y / mu)^T by tall-skinny QR, whose small
+    SVD gives the singular values and left singular vectors of X, and one
+    applying the thresholded projection L = U diag(s_thr / s) U^T X and the
+    S, residual and dual updates per block. Same "geometric" penalty
+    schedule and stopping test as pcp(); NaN entries are missing, as in
+    pcp(mask=...).
+
+    Returns (L, S) as read-only memmaps.
+    """
+    M = open_matrix(M)
+    n, m = M.shape
+    # work along the long side: column blocks of M, or of M.T for tall M
+    transpose = n > m
+    A = M.T if transpose else M
+    k, long = A.shape
+    os.makedirs(out_dir, exist_ok=True)
+    L = _output(out_dir, "L", (n, m), transpose)
+    S = _output(out_dir, "S", (n, m), transpose)
+    Y = _output(out_dir, "Y", (n, m), transpose)
+    blocks = _blocks(long, block_width(k, memory_budget, _PCP_COLUMN_ARRAYS,
+                                       _PCP_SQUARE_ARRAYS * 8 * k * k))
+
+    def read(b):
+        M_b = np.array(A[:, b], dtype=np.float64)
+        missing = np.isnan(M_b)
+        if not missing.any():
+            return M_b, None
+        M_b[missing] = 0.0
+        return M_b, missing
+
+    # norms for the IALM start (_init_ialm) in one pass
+    if lam is None:
+        lam = 1.0 / np.sqrt(max(n, m))
+    M_fro2 = norm_inf = 0.0
+    # inf-norm of M (largest absolute row sum): rows of M run along the
+    # blocks, or across them for tall M
+    row_abs = np.zeros(k)
+    R = None
+    for b in blocks:
+        M_b, _ = read(b)
+        M_fro2 += np.sum(M_b * M_b)
+        if transpose:
+            norm_inf = max(norm_inf, np.abs(M_b).sum(axis=0).max())
+        else:
+            row_abs += np.abs(M_b).sum(axis=1)
+        R = _tsqr_update(R, M_b.T)
+    norm_two = _left_svd(R)[1][0]
+    norm_inf = max(norm_inf, row_abs.max())
+    dual_norm = max(norm_two, norm_inf / lam)
+    M_fro = np.sqrt(M_fro2) + 1e-12
+    for b in blocks:
+        M_b, _ = read(b)
+        Y[:, b] = M_b / (dual_norm + 1e-12)
+        S[:, b] = 0.0
+        L[:, b] = 0.0
+    if mu is None:
+        mu = 1.25 / (norm_two + 1e-12)
+    mu_bar = mu * 1e7
+
+    def x_block(b):
+        # X = M - S + Y / mu, with missing entries taken from L
+        M_b, missing = read(b)
+        X_b = M_b - S[:, b] + Y[:, b] / mu
+        if missing is not None:
+            X_b[missing] = L[:, b][missing]
+        return M_b, missing, X_b
+
+    for it in range(max_iter):
+        U, s = _left_svd(tsqr_r(x_block(b)[2].T for b in blocks))
+        s_thr = np.maximum(s - 1.0 / mu, 0.0)
+        keep = s_thr > 0
+        U_k = U[:, keep]
+        P = (U_k * (s_thr[keep] / s[keep])) @ U_k.T
+
+        res2 = 0.0
+        for b in blocks:
+            M_b, missing, X_b = x_block(b)
+            L_b = P @ X_b
+            Y_b = np.array(Y[:, b])
+            S_b = shrink(M_b - L_b + Y_b / mu, lam / mu)
+            R_b = M_b - L_b - S_b
+            if missing is not None:
+                S_b[missing] = 0.0
+                R_b[missing] = 0.0
+            Y_b += mu * R_b
+            res2 += np.sum(R_b * R_b)
+            L[:, b] = L_b
+            S[:, b] = S_b
+            Y[:, b] = Y_b
+
+        err = np.sqrt(res2) / M_fro
+        if verbose and (it % 50 == 0 or err < tol):
+            print(f"[PCP out-of-core] iter {it}, err={err:.3e}, rank={int(keep.sum())}, "
+                  f"blocks={len(blocks)}")
+        if err < tol:
+            break
+        mu = min(mu * rho, mu_bar)
+
+    for A_out in (L, S, Y):
+        A_out.flush()
+    return (np.load(os.path.join(out_dir, "L.npy"), mmap_mode="r"),
+            np.load(os.path.join(out_dir, "S.npy"), mmap_mode="r"))
+
+
+def ircur_out_of_core(M, out_dir, rank, nr, nc, initial_threshold=None, memory_budget=2 ** 30,
+                      **kwargs):
+    """
+    IRCUR on a matrix larger than RAM. The sample-only mode of
+    IRCUR.decompose only ever reads the sampled rows and columns of M, so
+    it runs directly on the memmap, of any dtype (samples and blocks are
+    cast to float64 as they are read); L (from its CUR factors) and S are
+    then written to L.npy and S.npy under out_dir one column block at a
+    time, within memory_budget bytes. The iterations hold the nr x m and n x nc
+    samples (and a few arrays of their size), so nr / nc must leave them
+    within the budget too. initial_threshold defaults to 0.5 * max|M| (one
+    blockwise pass). Remaining keyword arguments go to decompose().
+
+    Returns (L, S) as read-only memmaps.
+    """
+    M = open_matrix(M)
+    n, m = M.shape
+    sampled = _IRCUR_SAMPLE_ARRAYS * 8 * (min(nr, n) * m + n * min(nc, m))
+    if sampled > memory_budget:
+        raise ValueError(f"nr={nr}, nc={nc} need about {sampled} bytes of samples, "
+                         f"over memory_budget={memory_budget}; lower nr / nc")
+    # output blocks: M, L, S and thresholding temporaries, next to the
+    # kept CUR factors
+    blocks = _blocks(m, block_width(n, memory_budget, 6, sampled // _IRCUR_SAMPLE_ARRAYS))
+    if initial_threshold is None:
+        initial_threshold = 0.5 * max(np.nanmax(np.abs(M[:, b])) for b in blocks)
+
+    res = IRCUR().decompose(M, rank, nr, nc, initial_threshold, sample_only=True,
+                            factored=True, **kwargs)
+    cur = res.low_rank
+
+    os.makedirs(out_dir, exist_ok=True)
+    L = _output(out_dir, "L", (n, m), False)
+    S = _output(out_dir, "S", (n, m), False)
+    for b in blocks:
+        L_b = cur.block(cols=b)
+        L[:, b] = L_b
+        # NaN (missing) entries have no sparse part
+        S[:, b] = thresholding(np.asarray(M[:, b], dtype=np.float64) - L_b, cur.threshold)
+    L.flush()
+    S.flush()
+    return (np.load(os.path.join(out_dir, "L.npy"), mmap_mode="r"),
+            np.load(os.path.join(out_dir, "S.npy"), mmap_mode="r"))
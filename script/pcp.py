@@ -0,0 +1,582 @@
+import inspect
+
+import numpy as np
+
+from .acceleration import Acceleration
+from .kernels import soft_threshold, sparse_dual_update
+from .result import RPCAResult, SVDFactors
+from .stopping import Residual, criterion
+from .svd import gram_needs_fallback, gram_svd, is_skinny, predict_rank, thresholded_svd
+
+# a solve from a state with re-initialised rows (IALMState.extend) restarts
+# the penalty at this multiple of the cold-start mu: low enough that the new
+# rows are re-optimised, high enough that the old rows stay put
+WARM_MU_RESTART = 1e3
+
+
+def shrink(X, tau, out=None):
+    # elementwise soft-threshold; out (not X itself) receives the result
+    return soft_threshold(X, tau, out=out)
+
+
+def _ialm_buffers(state, copy, dtype):
+    # the state iterates (copied when they belong to the caller) plus two
+    # scratch buffers, so the solver loops run without full-size temporaries
+    as_buffer = np.array if copy else np.asarray
+    L, S, Y = (as_buffer(A, dtype=dtype) for A in (state.L, state.S, state.Y))
+    return L, S, Y, np.empty_like(L), np.empty_like(L)
+
+
+def precision_tol(tol, dtype):
+    # relative residuals much below the working precision are not reachable
+    return max(tol, 100 * np.finfo(dtype).eps)
+
+
+def _observed(M, mask):
+    # M with its unobserved entries (mask False, or NaN by default) zeroed,
+    # plus the boolean array of those entries; None when all are observed
+    missing = np.isnan(M) if mask is None else ~np.asarray(mask, dtype=bool)
+    if not missing.any():
+        return M, None
+    return np.where(missing, 0, M).astype(M.dtype, copy=False), missing
+
+
+def _polished(solver, M, dtype, tol, factored, state, return_state, **kwargs):
+    # iterate in dtype as far as it resolves, then finish in float64
+    _, state = solver(M, tol=tol, dtype=dtype, polish=False, state=state,
+                      return_state=True, **kwargs)
+    return solver(M, tol=tol, dtype=np.float64, factored=factored, state=state,
+                  return_state=return_state, **kwargs)
+
+
+def svt(X, tau, svd_method="auto", k=None):
+    # singular value thresholding
+    U, s_thr, Vt, _ = thresholded_svd(X, tau, method=svd_method, k=k)
+    return (U * s_thr) @ Vt
+
+
+def weighted_svt(X, base_tau, s_prev=None, eps=1e-6, svd_method="auto", k=None):
+    """
+    SVT with per-component thresholds reweighted by the previous singular
+    values. Returns the thresholded matrix and the full-length vector of new
+    singular values (zeros beyond the surviving ones).
+    """
+    U, s_thr, Vt, s_new = _weighted_svt_factors(X, base_tau, s_prev, eps, svd_method, k)
+    return (U * s_thr) @ Vt, s_new
+
+
+def _weighted_svt_factors(X, base_tau, s_prev, eps, svd_method, k):
+    n = min(X.shape)
+    if s_prev is None:
+        tau_vec = np.full(n, base_tau)
+    else:
+        w = 1.0 / (np.abs(s_prev) + eps)
+        w = w / w.mean()
+        tau_vec = base_tau * w
+    U, s_thr, Vt, svp = thresholded_svd(X, tau_vec, method=svd_method, k=k)
+    s_new = np.zeros(n)
+    s_new[:svp] = s_thr
+    return U, s_thr, Vt, s_new
+
+
+def _init_ialm(M, lam, mu):
+    m, n = M.shape
+    if lam is None:
+        lam = 1.0 / np.sqrt(max(m, n))
+
+    norm_two = np.linalg.norm(M, 2)
+    norm_inf = np.linalg.norm(M, np.inf) / lam
+    dual_norm = max(norm_two, norm_inf)
+    Y = M / (dual_norm + 1e-12)
+
+    if mu is None:
+        mu = 1.25 / (norm_two + 1e-12)
+    return lam, mu, Y
+
+
+def l1_project(X, Vt, s=None, lam=1.0, n_iter=30, eps=1e-8, missing=None):
+    """
+    Row-wise robust projection onto the row space of Vt:
+        min_a  sum_i a_i^2 / (2 s_i) + lam ||x - a @ Vt||_1
+    for every row x of X. The quadratic term is the second-order growth of
+    ||L||_* when the row a @ Vt is appended to L = U diag(s) Vt, so this is
+    the PCP objective restricted to the new row; s=None drops it (plain L1
+    regression). Entries flagged in missing are left out of the L1 term
+    (the projection imputes them). Solved by iteratively reweighted least
+    squares, batched over rows.
+    """
+    if Vt.shape[0] == 0:
+        return np.zeros_like(X)
+    ridge = np.zeros(Vt.shape[0]) if s is None else 1.0 / (lam * np.maximum(s, eps))
+    A = X @ Vt.T
+    for _ in range(n_iter):
+        w = 1.0 / np.maximum(np.abs(X - A @ Vt), eps)
+        if missing is not None:
+            w[missing] = 0.0
+        G = np.einsum("kj,ij,lj->ikl", Vt, w, Vt) + np.diag(ridge)
+        b = np.einsum("kj,ij->ik", Vt, w * X)
+        A = np.linalg.solve(G, b[..., None])[..., 0]
+    return A @ Vt
+
+
+def _start_ialm(M, lam, mu, svd_rank, state, missing=None):
+    # fresh IALMState for M, or the given one extended to M's rows
+    m, n = M.shape
+    if state is None:
+        lam, mu, Y = _init_ialm(M, lam, mu)
+        sv = svd_rank or max(1, round(0.1 * min(m, n)))
+        state = IALMState(np.zeros_like(M), np.zeros_like(M), Y, mu, mu * 1e7,
+                          np.zeros((0, n)), np.zeros(0), sv=sv)
+    else:
+        if lam is None:
+            lam = 1.0 / np.sqrt(max(m, n))
+        state = state.extend(M, lam, missing=missing)
+        if mu is not None:
+            state.mu = mu
+        elif state.extended:
+            # resumed at mu_bar the re-initialised rows would keep their
+            # projection (the primal residual is already below tol); restart
+            # the schedule WARM_MU_RESTART times above a cold start instead
+            mu0 = 1.25 / (np.linalg.norm(M, 2) + 1e-12)
+            state.mu = min(state.mu, WARM_MU_RESTART * mu0)
+    state.lam = lam
+    return state
+
+
+class IALMState:
+    """
+    Full iterate of a pcp()/irls_rpca() solve: L, S, the dual Y, the
+    penalty mu (and its cap mu_bar), the last right singular vectors Vt,
+    the previous singular values for weighted_svt and the predicted SVD
+    rank. Passing it back as state= resumes the solve from this point.
+    """
+
+    def __init__(self, L, S, Y, mu, mu_bar, Vt, s, s_prev=None, sv=None, n_iter=0):
+        self.L = L
+        self.S = S
+        self.Y = Y
+        self.mu = mu
+        self.mu_bar = mu_bar
+        self.Vt = Vt
+        self.s = s
+        self.s_prev = s_prev
+        self.sv = sv
+        self.n_iter = n_iter
+        self.lam = None
+        # rows were re-initialised by extend(); the next solve restarts mu
+        self.extended = False
+
+    def save(self, path):
+        arrays = dict(L=self.L, S=self.S, Y=self.Y, mu=self.mu, mu_bar=self.mu_bar,
+                      Vt=self.Vt, s=self.s, sv=self.sv, n_iter=self.n_iter)
+        if self.s_prev is not None:
+            arrays["s_prev"] = self.s_prev
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(f["L"], f["S"], f["Y"], float(f["mu"]), float(f["mu_bar"]),
+                       f["Vt"], f["s"], f["s_prev"] if "s_prev" in f else None,
+                       int(f["sv"]), int(f["n_iter"]))
+
+    def extend(self, M, lam=None, changed=None, missing=None):
+        """
+        State for M whose leading rows are the matrix this state was solved
+        on and whose remaining rows were appended since (e.g. a new week).
+        New rows of L are the robust projection of the new data onto the
+        current row space (see l1_project), S takes the remainder and Y the
+        matching subgradient lam * sign(S). changed lists leading rows whose
+        data was revised since (e.g. late reports for a past week); they
+        are re-initialised the same way. Unobserved entries (missing, or
+        NaN in M by default) are imputed by the projection, with S = Y = 0
+        there. Solving from the returned state restarts the penalty
+        schedule (see WARM_MU_RESTART).
+        """
+        n_old, m_old = self.L.shape
+        n, m = M.shape
+        if m != m_old or n < n_old:
+            raise ValueError(f"Cannot extend a {self.L.shape} state to {M.shape}")
+        redo = np.arange(n_old, n)
+        if changed is not None:
+            changed = np.asarray(changed, dtype=np.intp)
+            redo = np.union1d(changed[changed < n_old], redo)
+        if not len(redo):
+            state = IALMState(self.L, self.S, self.Y, self.mu, self.mu_bar, self.Vt,
+                              self.s, self.s_prev, self.sv, self.n_iter)
+            state.extended = self.extended
+            return state
+        if lam is None:
+            lam = 1.0 / np.sqrt(max(n, m))
+
+        gaps = np.isnan(M[redo]) if missing is None else missing[redo]
+        M_new = np.where(gaps, 0.0, M[redo])
+        L_new = l1_project(M_new, self.Vt, self.s, lam, missing=gaps)
+        S_new = shrink(M_new - L_new, 1e-8 * (np.abs(M_new).max() + 1e-12))
+        S_new[gaps] = 0.0
+        pad = np.zeros((n - n_old, m))
+        L, S, Y = (np.vstack([A, pad]) for A in (self.L, self.S, self.Y))
+        L[redo], S[redo], Y[redo] = L_new, S_new, lam * np.sign(S_new)
+        state = IALMState(L, S, Y, self.mu, self.mu_bar, self.Vt, self.s, self.s_prev,
+                          self.sv, self.n_iter)
+        state.extended = True
+        return state
+
+
+def pcp(M, lam=None, mu=None, max_iter=1000, tol=1e-7, rho=1.5, verbose=False,
+        svd_method="auto", svd_rank=None, factored=False, state=None, return_state=False,
+        dtype=np.float64, polish=False, mu_schedule="geometric", extrapolation=None,
+        stopping=None, mask=None):
+    """
+    Classic convex RPCA (PCP) via IALM:
+        min ||L||_* + lam ||S||_1  s.t. M = L + S
+
+    svd_method selects the SVT backend: "full" (dense LAPACK SVD), "gram"
+    (eigendecomposition of the small Gram matrix, with a full-SVD fallback
+    when the needed singular values are too small to trust), "qr" (QR of
+    the long side + small SVD), "auto" ("gram" on tall-skinny/short-wide
+    matrices such as the date x group ones, "full" otherwise), "randomized"
+    (range finder) or "lanczos" (ARPACK). The partial backends
+    only compute the leading singular triplets, starting from svd_rank
+    (default 10% of the smaller dimension) and predicting the rank for the
+    next iteration from the number of values that survived this one.
+    "lanczos" matches the full SVD to machine precision; "randomized" is
+    approximate for singular values sitting close to the threshold.
+
+    factored=True returns an RPCAResult with L kept as its SVD factors
+    instead of the dense (L, S) pair.
+
+    state= warm-starts from an IALMState returned by an earlier call with
+    return_state=True (output becomes (out, state)). M may have extra rows
+    appended since; see IALMState.extend().
+
+    dtype=np.float32 runs the iterations in single precision (half the
+    memory, faster SVDs); tol is then raised to what float32 can resolve
+    (see precision_tol). polish=True finishes the solve in float64 from the
+    float32 iterate down to the requested tol. compare_precision() measures
+    the difference to a float64 reference.
+
+    mu_schedule / extrapolation select the penalty schedule and the
+    acceleration of the iterates (see acceleration.Acceleration). The
+    default "geometric" schedule grows mu by rho every iteration and stops
+    once M = L + S holds to tol, which on the date x group matrices takes
+    30-40 iterations but leaves the objective 0.3-0.8% above its optimum.
+    mu_schedule="balanced" solves to the optimum (both residuals below
+    tol); extrapolation="nesterov" or "anderson" cuts its 1000-1600
+    iterations there to 300-800 (see benchmark_ialm_schedules.py).
+
+    stopping= takes a criterion from stopping.py (Every, Sampled,
+    SingularValueChange, ...) in place of the default exact test
+    ||M - L - S||_F / ||M||_F < tol on every iteration.
+
+    mask= (boolean, True where observed; default: the non-NaN entries of M)
+    solves PCP with missing entries, M = L + S on the observed entries
+    only (Candes et al. 2011, sec. 1.6). Unobserved entries get no sparse
+    part and no residual, so L completes them instead of fitting fake
+    zeros; the SVT step fills them from the current L.
+    """
+    if polish and np.dtype(dtype) != np.float64:
+        return _polished(pcp, M, dtype, tol, factored, state, return_state, lam=lam,
+                         mu=mu, max_iter=max_iter, rho=rho, verbose=verbose,
+                         svd_method=svd_method, svd_rank=svd_rank,
+                         mu_schedule=mu_schedule, extrapolation=extrapolation,
+                         stopping=stopping, mask=mask)
+    M, missing = _observed(np.asarray(M, dtype=dtype), mask)
+    tol = precision_tol(tol, dtype)
+    m, n = M.shape
+    warm = state is not None
+    state = _start_ialm(M, lam, mu, svd_rank, state, missing)
+    lam = state.lam
+    mu, mu_bar, sv = float(state.mu), float(state.mu_bar), state.sv
+    L, S, Y, X, T = _ialm_buffers(state, copy=warm, dtype=dtype)
+    U, s_thr, Vt = np.zeros((m, len(state.s))), state.s, state.Vt
+
+    M_fro = np.linalg.norm(M, "fro") + 1e-12
+    acc = Acceleration(M.shape, dtype, mu_schedule, extrapolation, rho, mu_bar)
+    stop = criterion(stopping, tol)
+    stop.start()
+    next_log = 0
+    k = -1
+
+    for k in range(max_iter):
+        # L update on X = M - S + Y / mu (T keeps Y / mu for the S update);
+        # S_in, Y_in are S, Y themselves unless accelerated
+        S_in, Y_in = acc.point(S, Y, mu)
+        np.multiply(Y_in, 1.0 / mu, out=T)
+        np.subtract(M, S_in, out=X)
+        X += T
+        if missing is not None:
+            np.copyto(X, L, where=missing)
+        U, s_thr, Vt, svp = thresholded_svd(X, 1.0 / mu, method=svd_method, k=sv)
+        np.matmul(U * s_thr, Vt, out=L)
+        sv = predict_rank(svp, sv, min(m, n))
+        # S update on X = M - L + Y / mu
+        # and the residual R = M - L - S (in T) with the dual Y = Y_in + mu * R,
+        # fused into one pass; |R|^2 comes with it when a check is due
+        checked = stop.due(k)
+        res2 = sparse_dual_update(M, L, T, Y_in, mu, lam, S, Y, X, missing,
+                                  want_norm=checked)
+        # measured once per check, for the test, the log and mu balancing
+        err = dual_err = None
+        if checked:
+            done, err = stop.check(Residual([T], M_fro, s_thr, sq_norms=[res2]))
+            dual_err = acc.dual_residual(S, S_in, mu) / M_fro
+
+        if verbose and checked and k >= next_log:
+            print(f"[PCP] iter {k}, err={err:.3e}, rank={svp}")
+            next_log = k + 50
+        if checked and done and dual_err < stop.tol:
+            if verbose:
+                print(f"[PCP] converged at iter {k}, err={err:.3e}")
+            break
+
+        mu = acc.next_mu(mu, err, dual_err)
+
+    # without an iteration (max_iter=0) U is only a placeholder: factor the
+    # state's L instead
+    low_rank = SVDFactors(U, s_thr, Vt) if k >= 0 else SVDFactors.from_dense(L)
+    out = RPCAResult(low_rank, S=S) if factored else (L, S)
+    if return_state:
+        return out, IALMState(L, S, Y, mu, mu_bar, Vt, s_thr, sv=sv, n_iter=k + 1)
+    return out
+
+
+def irls_rpca(M, lam=None, max_iter=1000, tol=1e-7, rho=1.5, verbose=False,
+              svd_method="auto", svd_rank=None, factored=False, state=None,
+              return_state=False, dtype=np.float64, polish=False, mu_schedule="geometric",
+              extrapolation=None, stopping=None, mask=None):
+    """
+    IRLS-style non-convex RPCA:
+        M = L + S
+
+    svd_method / svd_rank select the SVT backend, factored the return type,
+    state / return_state warm-start and resume and dtype / polish the
+    working precision, mu_schedule / extrapolation the acceleration and
+    stopping the convergence test and mask the observed entries, as in
+    pcp(). The state also carries the previous singular values used by
+    weighted_svt. The reweighting moves the fixed point every iteration, so
+    the "balanced" schedule does not settle here within a few thousand
+    iterations on the date x group matrices; keep "geometric" for IRLS.
+    """
+    if polish and np.dtype(dtype) != np.float64:
+        return _polished(irls_rpca, M, dtype, tol, factored, state, return_state,
+                         lam=lam, max_iter=max_iter, rho=rho, verbose=verbose,
+                         svd_method=svd_method, svd_rank=svd_rank,
+                         mu_schedule=mu_schedule, extrapolation=extrapolation,
+                         stopping=stopping, mask=mask)
+    M, missing = _observed(np.asarray(M, dtype=dtype), mask)
+    tol = precision_tol(tol, dtype)
+    m, n = M.shape
+    warm = state is not None
+    state = _start_ialm(M, lam, None, svd_rank, state, missing)
+    lam = state.lam
+    mu, mu_bar, sv = float(state.mu), float(state.mu_bar), state.sv
+    L, S, Y, X, T = _ialm_buffers(state, copy=warm, dtype=dtype)
+    U, s_thr, Vt = np.zeros((m, len(state.s))), state.s, state.Vt
+    M_fro = np.linalg.norm(M, "fro") + 1e-12
+
+    acc = Acceleration(M.shape, dtype, mu_schedule, extrapolation, rho, mu_bar)
+    stop = criterion(stopping, tol)
+    stop.start()
+    next_log = 0
+
+    s_prev = state.s_prev
+    k = -1
+
+    for k in range(max_iter):
+        # L update: weighted SVT of X = M - S + Y / mu
+        S_in, Y_in = acc.point(S, Y, mu)
+        np.multiply(Y_in, 1.0 / mu, out=T)
+        np.subtract(M, S_in, out=X)
+        X += T
+        if missing is not None:
+            np.copyto(X, L, where=missing)
+        U, s_thr, Vt, s_prev = _weighted_svt_factors(X, 1.0 / mu, s_prev, 1e-6,
+                                                     svd_method, sv)
+        np.matmul(U * s_thr, Vt, out=L)
+        svp = int(np.count_nonzero(s_prev))
+        sv = predict_rank(svp, sv, min(m, n))
+
+        # S update: soft-threshold X = M - L + Y / mu
+        # and the residual R = M - L - S (in T) with the dual Y = Y_in + mu * R,
+        # fused into one pass; |R|^2 comes with it when a check is due
+        checked = stop.due(k)
+        res2 = sparse_dual_update(M, L, T, Y_in, mu, lam, S, Y, X, missing,
+                                  want_norm=checked)
+        # measured once per check, for the test, the log and mu balancing
+        err = dual_err = None
+        if checked:
+            done, err = stop.check(Residual([T], M_fro, s_thr, sq_norms=[res2]))
+            dual_err = acc.dual_residual(S, S_in, mu) / M_fro
+
+        if verbose and checked and k >= next_log:
+            print(f"[IRLS] iter {k}, err={err:.3e}, rank={svp}")
+            next_log = k + 50
+        if checked and done and dual_err < stop.tol:
+            if verbose:
+                print(f"[IRLS] converged at iter {k}, err={err:.3e}")
+            break
+
+        mu = acc.next_mu(mu, err, dual_err)
+
+    # without an iteration (max_iter=0) U is only a placeholder: factor the
+    # state's L instead
+    low_rank = SVDFactors(U, s_thr, Vt) if k >= 0 else SVDFactors.from_dense(L)
+    out = RPCAResult(low_rank, S=S) if factored else (L, S)
+    if return_state:
+        return out, IALMState(L, S, Y, mu, mu_bar, Vt, s_thr, s_prev=s_prev, sv=sv,
+                              n_iter=k + 1)
+    return out
+
+
+def _ialm_batch(Ms, lam, mu, max_iter, tol, rho, verbose, weighted, factored, name,
+                svd_method="auto"):
+    Ms = np.asarray(Ms, dtype=float)
+    B, m, n = Ms.shape
+    k = min(m, n)
+
+    if lam is None:
+        lam = 1.0 / np.sqrt(max(m, n))
+    lam = np.broadcast_to(np.asarray(lam, dtype=float), (B,)).copy()
+
+    norm_two = np.linalg.norm(Ms, 2, axis=(1, 2))
+    norm_inf = np.linalg.norm(Ms, np.inf, axis=(1, 2)) / lam
+    dual_norm = np.maximum(norm_two, norm_inf)
+    Y = Ms / (dual_norm + 1e-12)[:, None, None]
+
+    if mu is None:
+        mu = 1.25 / (norm_two + 1e-12)
+    mu = np.broadcast_to(np.asarray(mu, dtype=float), (B,)).copy()
+    mu_bar = mu * 1e7
+
+    L = np.zeros_like(Ms)
+    S = np.zeros_like(Ms)
+    U_all, s_all, Vt_all = np.zeros((B, m, k)), np.zeros((B, k)), np.zeros((B, k, n))
+    M_fro = np.linalg.norm(Ms, axis=(1, 2)) + 1e-12
+    use_gram = svd_method == "gram" or (svd_method == "auto" and is_skinny((m, n)))
+
+    active = np.ones(B, dtype=bool)
+    n_iter = np.zeros(B, dtype=int)
+
+    for it in range(max_iter):
+        a = np.flatnonzero(active)
+        if len(a) == 0:
+            break
+        idx = a
+        # plain slicing while every problem is active avoids gather copies
+        a = slice(None) if len(a) == B else a
+        inv_mu = 1.0 / mu[a]
+
+        # L update: one stacked SVD over the still-active problems
+        X = Ms[a] - S[a] + inv_mu[:, None, None] * Y[a]
+        if use_gram:
+            U, s, Vt, cutoff = gram_svd(X)
+        else:
+            U, s, Vt = np.linalg.svd(X, full_matrices=False)
+        if weighted and it > 0:
+            w = 1.0 / (np.abs(s_all[a]) + 1e-6)
+            w = w / w.mean(axis=1, keepdims=True)
+            tau = inv_mu[:, None] * w
+        else:
+            tau = inv_mu[:, None]
+        if use_gram:
+            bad = gram_needs_fallback(s, tau, cutoff)
+            if bad.any():
+                U[bad], s[bad], Vt[bad] = np.linalg.svd(X[bad], full_matrices=False)
+        s_thr = np.maximum(s - tau, 0.0)
+        L[a] = (U * s_thr[:, None, :]) @ Vt
+        U_all[a], s_all[a], Vt_all[a] = U, s_thr, Vt
+
+        # S update
+        S[a] = shrink(Ms[a] - L[a] + inv_mu[:, None, None] * Y[a],
+                      (lam[a] * inv_mu)[:, None, None])
+
+        R = Ms[a] - L[a] - S[a]
+        Y[a] += mu[a][:, None, None] * R
+
+        err = np.linalg.norm(R, axis=(1, 2)) / M_fro[a]
+        n_iter[a] = it + 1
+        done = err < tol
+        if verbose and (it % 50 == 0 or done.any()):
+            print(f"[{name}] iter {it}, active={len(idx)}, max err={err.max():.3e}")
+        active[idx[done]] = False
+
+        mu[a] = np.minimum(mu[a] * rho, mu_bar[a])
+
+    if verbose:
+        print(f"[{name}] iterations per problem: {n_iter.tolist()}")
+
+    if factored:
+        results = []
+        for b in range(B):
+            keep = s_all[b] > 0
+            factors = SVDFactors(U_all[b][:, keep], s_all[b][keep], Vt_all[b][keep])
+            results.append(RPCAResult(factors, S=S[b]))
+        return results
+    return L, S
+
+
+def pcp_batch(Ms, lam=None, mu=None, max_iter=1000, tol=1e-7, rho=1.5, verbose=False,
+              factored=False, svd_method="auto"):
+    """
+    PCP on a stack of same-shaped matrices Ms (B x m x n) at once, e.g.
+    continents and WHO regions, several value columns, or a grid of lam
+    values. lam and mu may be scalars or length-B arrays. Each problem keeps
+    its own mu, dual and convergence flag; converged problems drop out of
+    the stacked SVD and stop updating. svd_method is "auto", "gram" or
+    "full" (see pcp()).
+
+    Returns stacked (L, S), or a list of RPCAResult with factored=True.
+    """
+    return _ialm_batch(Ms, lam, mu, max_iter, tol, rho, verbose,
+                       weighted=False, factored=factored, name="PCP batch",
+                       svd_method=svd_method)
+
+
+def irls_rpca_batch(Ms, lam=None, max_iter=1000, tol=1e-7, rho=1.5, verbose=False,
+                    factored=False, svd_method="auto"):
+    """
+    Batched irls_rpca(), same conventions as pcp_batch().
+    """
+    return _ialm_batch(Ms, lam, None, max_iter, tol, rho, verbose,
+                       weighted=True, factored=factored, name="IRLS batch",
+                       svd_method=svd_method)
+
+
+SOLVE_MANY = {"pcp": (pcp, pcp_batch), "irls": (irls_rpca, irls_rpca_batch)}
+
+
+def solve_many(Ms, solver="pcp", masks=None, **kwargs):
+    """
+    Run pcp or irls_rpca on a list of matrices, batching the ones that share
+    a shape. Matrices with missing entries (a masks entry, or NaNs) are
+    solved one at a time with the masked solver instead, and so are all of
+    them when kwargs hold an option only the per-matrix solver has (e.g.
+    stopping=, mu_schedule=). Options the solver does not take at all
+    raise ValueError. Returns a list of RPCAResult in input order.
+    """
+    if solver not in SOLVE_MANY:
+        raise ValueError(f"Unknown solver {solver!r}; expected one of {list(SOLVE_MANY)}")
+    single_solver, batch_solver = SOLVE_MANY[solver]
+    options = inspect.signature(single_solver).parameters
+    for name in kwargs:
+        if name in ("mask", "factored", "state", "return_state"):
+            raise ValueError(f"solve_many() does not take {name!r} (masks= gives the masks; "
+                             f"results are always factored, without state)")
+        if name not in options:
+            raise ValueError(f"Unknown option {name!r} for solver {solver!r}")
+    batched = set(kwargs) <= set(inspect.signature(batch_solver).parameters)
+    masks = [None] * len(Ms) if masks is None else masks
+    results = [None] * len(Ms)
+    by_shape = {}
+    for i, (M, mask) in enumerate(zip(Ms, masks)):
+        if not batched or mask is not None or np.isnan(M).any():
+            results[i] = single_solver(M, mask=mask, factored=True, **kwargs)
+        else:
+            by_shape.setdefault(np.shape(M), []).append(i)
+
+    for idx in by_shape.values():
+        out = batch_solver(np.stack([Ms[i] for i in idx]), factored=True, **kwargs)
+        for i, res in zip(idx, out):
+            results[i] = res
+    return results
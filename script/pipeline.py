@@ -0,0 +1,174 @@
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+
+class Stage:
+    """
+    One pipeline step: func(*args) reads the files in inputs and writes the
+    files in outputs. A stage whose inputs are another stage's outputs
+    depends on it. func must be a module-level function (it is run on a
+    process pool).
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), args=()):
+        self.name = name
+        self.func = func
+        self.inputs = [os.path.abspath(p) for p in inputs]
+        self.outputs = [os.path.abspath(p) for p in outputs]
+        self.args = tuple(args)
+
+    def up_to_date(self):
+        # make-style: all outputs exist and none is older than an input
+        if not self.outputs or not all(os.path.exists(p) for p in self.outputs):
+            return False
+        oldest = min(os.path.getmtime(p) for p in self.outputs)
+        return all(os.path.getmtime(p) <= oldest for p in self.inputs if os.path.exists(p))
+
+
+def run_script(path, cwd=None, env=None):
+    """
+    Run a standalone script in a fresh interpreter (stage func for the
+    plotting scripts); raises RuntimeError with the end of its stderr if
+    it fails.
+    """
+    proc = subprocess.run([sys.executable, path], cwd=cwd, env=env, capture_output=True,
+                          text=True)
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"{os.path.basename(path)} exited with {proc.returncode}:\n{tail}")
+
+
+def _timed(func, args):
+    # (wall time, exception or None): a failed stage keeps its time too
+    start = time.perf_counter()
+    try:
+        func(*args)
+    except Exception as e:
+        return time.perf_counter() - start, e
+    return time.perf_counter() - start, None
+
+
+def _outcome(secs, error):
+    # finish() arguments for a _timed() result
+    return ("ran" if error is None else "failed"), secs, error
+
+
+class Pipeline:
+    """
+    Stages as a dependency graph, derived from their input / output files.
+    """
+
+    def __init__(self, stages):
+        self.stages = {}
+        producer = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name {stage.name!r}")
+            self.stages[stage.name] = stage
+            for path in stage.outputs:
+                if path in producer:
+                    raise ValueError(f"{path} is written by both {producer[path]!r} "
+                                     f"and {stage.name!r}")
+                producer[path] = stage.name
+        self.deps = {
+            stage.name: sorted({producer[p] for p in stage.inputs if p in producer} - {stage.name})
+            for stage in stages
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        order, done = [], set()
+        remaining = list(self.stages)
+        while remaining:
+            ready = [name for name in remaining if all(d in done for d in self.deps[name])]
+            if not ready:
+                raise ValueError(f"Dependency cycle among stages {remaining}")
+            order.extend(ready)
+            done.update(ready)
+            remaining = [name for name in remaining if name not in done]
+        return order
+
+    def stale(self):
+        """
+        Names of the stages run() would run without force, in dependency
+        order: those not up to date and everything downstream of them.
+        """
+        out = set()
+        for name in self.order:
+            if not self.stages[name].up_to_date() or any(d in out for d in self.deps[name]):
+                out.add(name)
+        return [name for name in self.order if name in out]
+
+    def run(self, n_jobs=None, force=False, verbose=True):
+        """
+        Run the stages in dependency order, independent branches
+        concurrently on a process pool of n_jobs workers (n_jobs=1 runs
+        them one by one in this process). A stage is skipped as up to date
+        when its outputs are newer than its inputs and none of its
+        dependencies ran (force=True reruns everything). A failed stage
+        does not stop the others, but everything downstream of it is
+        skipped.
+
+        Returns a DataFrame with one row per stage: its status ("ran",
+        "up to date", "failed" or "blocked"), wall time in seconds (failed
+        stages included) and error.
+        """
+        status, seconds, errors = {}, {}, {}
+        pending = list(self.order)
+        running = {}
+        pool = None if n_jobs == 1 else ProcessPoolExecutor(max_workers=n_jobs)
+
+        def finish(name, state, secs=0.0, error=None):
+            status[name], seconds[name] = state, secs
+            if error is not None:
+                errors[name] = f"{type(error).__name__}: {error}"
+            if verbose:
+                line = f"[pipeline] {name}: {state}"
+                if state in ("ran", "failed"):
+                    line += f" in {secs:.2f}s"
+                if error is not None:
+                    line += f" ({errors[name]})"
+                print(line)
+
+        try:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.deps[name]
+                    if any(status.get(d) in ("failed", "blocked") for d in deps):
+                        pending.remove(name)
+                        finish(name, "blocked")
+                        continue
+                    if not all(d in status for d in deps):
+                        continue
+                    pending.remove(name)
+                    stage = self.stages[name]
+                    if (not force and stage.up_to_date()
+                            and not any(status[d] == "ran" for d in deps)):
+                        finish(name, "up to date")
+                    elif pool is None:
+                        finish(name, *_outcome(*_timed(stage.func, stage.args)))
+                    else:
+                        running[pool.submit(_timed, stage.func, stage.args)] = name
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            finish(name, *_outcome(*future.result()))
+                        except Exception as e:
+                            # the worker itself died (or the result did not pickle)
+                            finish(name, "failed", error=e)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return pd.DataFrame([
+            dict(stage=name, status=status[name], seconds=seconds[name],
+                 error=errors.get(name, ""))
+            for name in self.order
+        ])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from .resample import period_start
+
+AGGFUNCS = ("mean", "sum", "count")
+
+
+def _as_list(x):
+    return [x] if isinstance(x, str) else list(x)
+
+
+def _codes(col):
+    # sorted integer codes of a key column (-1 for missing keys) and its
+    # labels; categoricals keep only the observed categories
+    codes, labels = pd.factorize(col, sort=True)
+    return codes, pd.Index(np.asarray(labels))
+
+
+def build_matrices(df, index, columns, values, aggfuncs="mean", freq=None, anchor="MON"):
+    """
+    Every index x column matrix of df in one pass, as
+    pivot_table(index=index, columns=c, values=v, aggfunc=a, observed=True)
+    for all c in columns, v in values and a in aggfuncs ("mean", "sum",
+    "count"; single names or lists).
+
+    The index is factorized once, and each group column once. Every
+    (group, value) pair is then scattered with np.bincount into counts and
+    sums that give all the aggregates. freq ("D", "W" or "M", see
+    resample.period_start) buckets the index into periods first, e.g.
+    weekly matrices straight from the daily table.
+
+    As with pivot_table, cells without rows are NaN and rows / columns
+    without any cell are dropped. Mean and sum may differ from pandas in
+    the last bit, because pandas uses compensated summation. Returns
+    {(column, value, aggfunc): DataFrame}, each backed by one C-contiguous
+    float64 array.
+    """
+    columns, values, aggfuncs = _as_list(columns), _as_list(values), _as_list(aggfuncs)
+    for aggfunc in aggfuncs:
+        if aggfunc not in AGGFUNCS:
+            raise ValueError(f"Unknown aggfunc {aggfunc!r}; expected one of {list(AGGFUNCS)}")
+
+    keys = df[index] if freq is None else period_start(df[index], freq, anchor)
+    row_codes, row_labels = _codes(keys)
+    row_labels.name = index
+    x = {v: df[v].to_numpy(dtype=float) for v in values}
+
+    out = {}
+    for column in columns:
+        col_codes, col_labels = _codes(df[column])
+        col_labels.name = column
+        n, m = len(row_labels), len(col_labels)
+        valid = (row_codes >= 0) & (col_codes >= 0)
+        flat = row_codes * m + col_codes
+        rows = np.bincount(flat[valid], minlength=n * m).reshape(n, m)
+
+        for v in values:
+            ok = valid & ~np.isnan(x[v])
+            count = np.bincount(flat[ok], minlength=n * m).reshape(n, m)
+            total = np.bincount(flat[ok], weights=x[v][ok], minlength=n * m).reshape(n, m)
+            for aggfunc in aggfuncs:
+                if aggfunc == "mean":
+                    # groups whose values are all missing count as absent
+                    present = count > 0
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        mat = total / count
+                elif aggfunc == "sum":
+                    present = rows > 0
+                    mat = total
+                else:
+                    present = rows > 0
+                    mat = count.astype(float)
+                mat = np.where(present, mat, np.nan)
+                keep_rows, keep_cols = present.any(axis=1), present.any(axis=0)
+                mat = np.ascontiguousarray(mat[keep_rows][:, keep_cols])
+                # copy=False: .values stays this C-contiguous array
+                out[column, v, aggfunc] = pd.DataFrame(mat, index=row_labels[keep_rows],
+                                                       columns=col_labels[keep_cols], copy=False)
+    return out
+
+
+def build_matrix(df, index, column, values, aggfunc="mean", freq=None, anchor="MON"):
+    """
+    One matrix of build_matrices(): a faster pivot_table(index=index,
+    columns=column, values=values, aggfunc=aggfunc, observed=True).
+    """
+    return build_matrices(df, index, column, values, aggfunc, freq, anchor)[column, values, aggfunc]
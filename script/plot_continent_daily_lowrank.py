@@ -1,12 +1,13 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 def load(name):
-    return pd.read_csv(os.path.join(BASE, name), index_col=0, parse_dates=True)
+    return read_frame(os.path.join(BASE, name))
 
 # DAILY per-100k matrices
 M      = load("rpca_continent_cases_per100k_matrix.csv")   # original
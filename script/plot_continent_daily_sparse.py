@@ -1,16 +1,18 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+from robustpca.sparse_io import read_sparse_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 def load(name):
-    return pd.read_csv(os.path.join(BASE, name), index_col=0, parse_dates=True)
+    return read_frame(os.path.join(BASE, name))
 
 M       = load("rpca_continent_cases_per100k_matrix.csv")   # original
-S_pcp   = load("rpca_continent_cases_per100k_sparse.csv")   # convex sparse
-S_irls  = load("daily_continent_cases_per100k_ircur_sparse.csv")   # IRCUR sparse
+S_pcp   = read_sparse_frame(os.path.join(BASE, "rpca_continent_cases_per100k_sparse.csv"), M.index, M.columns)   # convex sparse
+S_irls  = read_sparse_frame(os.path.join(BASE, "daily_continent_cases_per100k_ircur_sparse.csv"), M.index, M.columns)   # IRCUR sparse
 
 cols = M.columns
 M      = M[cols].sort_index()
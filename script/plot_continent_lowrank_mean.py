@@ -1,12 +1,13 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 def load(path):
-    return pd.read_csv(path, index_col=0, parse_dates=True)
+    return read_frame(path)
 
 # --- Load matrices (all based on WEEKLY MEAN) ---
 M      = load(os.path.join(BASE, "rpca_continent_cases_matrix.csv"))        # original weekly mean
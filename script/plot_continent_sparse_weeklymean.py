@@ -1,17 +1,19 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+from robustpca.sparse_io import read_sparse_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 def load(path):
-    return pd.read_csv(path, index_col=0, parse_dates=True)
+    return read_frame(path)
 
 # --- Load matrices (weekly MEAN) ---
 M       = load(os.path.join(BASE, "rpca_continent_cases_matrix.csv"))           # original weekly mean
-S_pcp   = load(os.path.join(BASE, "rpca_continent_cases_sparse.csv"))           # convex PCP sparse
-S_irls  = load(os.path.join(BASE, "weekly_continent_cases_per100k_ircur_sparse.csv"))   # IRCUR sparse
+S_pcp   = read_sparse_frame(os.path.join(BASE, "rpca_continent_cases_sparse.csv"), M.index, M.columns)   # convex PCP sparse
+S_irls  = read_sparse_frame(os.path.join(BASE, "weekly_continent_cases_per100k_ircur_sparse.csv"), M.index, M.columns)   # IRCUR sparse
 
 # Align index & columns
 cols = M.columns
@@ -1,16 +1,17 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.tables import load_table
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 DATA = os.path.join(BASE, "clean_weekly_SUM_latest.csv")
 
-df = pd.read_csv(DATA, parse_dates=["week"])
+df = load_table(DATA)
 
 # ---------------- Continent-level mean values ----------------
 weekly = (
-    df.groupby(["continent", "week"], as_index=False)
+    df.groupby(["continent", "week"], as_index=False, observed=True)
       .agg({
           "new_cases_per_100k": "sum",
           "pfv_per_hundred": "last",
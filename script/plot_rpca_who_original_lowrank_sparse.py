@@ -1,12 +1,14 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+from robustpca.sparse_io import read_sparse_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 def load(path):
-    return pd.read_csv(path, index_col=0, parse_dates=True)
+    return read_frame(path)
 
 # --------- Load the RPCA outputs for WHO regions ----------
 M_path  = os.path.join(BASE, "rpca_who_cases_matrix.csv")
@@ -15,7 +17,7 @@ S_path  = os.path.join(BASE, "rpca_who_cases_sparse.csv")
 
 M = load(M_path)   # original weekly new_cases_per_100k (matrix)
 L = load(L_path)   # low-rank component
-S = load(S_path)   # sparse component
+S = read_sparse_frame(S_path, M.index, M.columns)   # sparse component
 
 # Align columns and index
 cols = M.columns
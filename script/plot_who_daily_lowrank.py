@@ -1,12 +1,13 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.decomposition_io import read_frame
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 def load(name):
-    return pd.read_csv(os.path.join(BASE, name), index_col=0, parse_dates=True)
+    return read_frame(os.path.join(BASE, name))
 
 M      = load("rpca_who_cases_per100k_matrix.csv")    # original
 L_pcp  = load("rpca_who_cases_per100k_lowrank.csv")   # convex PCP
@@ -0,0 +1,38 @@
+import time
+
+import numpy as np
+
+from .ircur import IRCUR
+from .pcp import irls_rpca, pcp
+
+
+def _solve(M, solver, dtype, polish, seed, kwargs):
+    start = time.perf_counter()
+    if solver == "ircur":
+        # same seed, so both runs see the same row/column samples
+        L, S = IRCUR().decompose(M, dtype=dtype, polish=polish, random_state=seed, **kwargs)
+    else:
+        func = {"pcp": pcp, "irls": irls_rpca}[solver]
+        L, S = func(M, dtype=dtype, polish=polish, **kwargs)
+    return np.asarray(L, dtype=float), np.asarray(S, dtype=float), time.perf_counter() - start
+
+
+def compare_precision(M, solver="pcp", dtype=np.float32, polish=False, seed=0, **kwargs):
+    """
+    Solve M with solver ("pcp", "irls" or "ircur") in dtype (optionally
+    polished in float64) and in float64, and report how far apart the two
+    decompositions are: the relative Frobenius differences of L and S, the
+    largest absolute entry difference and both wall times.
+    """
+    M = np.asarray(M, dtype=float)
+    L_ref, S_ref, t_ref = _solve(M, solver, np.float64, False, seed, kwargs)
+    L, S, t = _solve(M, solver, dtype, polish, seed, kwargs)
+    return dict(
+        dtype=np.dtype(dtype).name,
+        polish=polish,
+        L_rel_diff=float(np.linalg.norm(L - L_ref) / (np.linalg.norm(L_ref) + 1e-12)),
+        S_rel_diff=float(np.linalg.norm(S - S_ref) / (np.linalg.norm(S_ref) + 1e-12)),
+        max_abs_diff=float(max(np.abs(L - L_ref).max(), np.abs(S - S_ref).max())),
+        seconds=t,
+        seconds_float64=t_ref,
+    )
@@ -0,0 +1,50 @@
+import numpy as np
+
+FREQS = ("D", "W", "M")
+WEEKDAYS = ("MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN")
+
+# per-column aggregation of the two weekly pipelines: summed cases with
+# the latest vaccination / population value, or plain means
+SUM_RULES = {"new_cases_per_100k": "sum", "pfv_per_hundred": "last", "population": "last"}
+MEAN_RULES = {"new_cases_per_100k": "mean", "pfv_per_hundred": "mean", "population": "mean"}
+
+
+def period_start(dates, freq="W", anchor="MON"):
+    """
+    Start of the day / week / month (freq "D", "W", "M") of each date, by
+    integer arithmetic on days since the epoch. Weeks start on the anchor
+    weekday; the default "MON" gives the same weeks as pandas'
+    to_period("W"). NaT stays NaT. Returns an array in the unit of dates.
+    """
+    dates = np.asarray(dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        dates = dates.astype("datetime64[ns]")
+    days = dates.astype("datetime64[D]")
+    if freq == "D":
+        start = days
+    elif freq == "M":
+        start = days.astype("datetime64[M]").astype("datetime64[D]")
+    elif freq == "W":
+        if anchor.upper() not in WEEKDAYS:
+            raise ValueError(f"Unknown anchor {anchor!r}; expected one of {list(WEEKDAYS)}")
+        d = days.astype(np.int64)
+        # 1970-01-01 was a Thursday (weekday 3)
+        offset = (d + 3 - WEEKDAYS.index(anchor.upper())) % 7
+        start = (d - offset).astype("datetime64[D]")
+        start[np.isnat(days)] = np.datetime64("NaT")
+    else:
+        raise ValueError(f"Unknown freq {freq!r}; expected one of {list(FREQS)}")
+    return start.astype(dates.dtype)
+
+
+def resample(df, by, rules, freq="W", anchor="MON", date_col="date", period_col="week"):
+    """
+    Aggregate a daily table to periods: bucket date_col with period_start()
+    into period_col, then apply the per-column rules ({column: "sum" /
+    "mean" / "last" / ...}, e.g. SUM_RULES or MEAN_RULES) within each
+    (by..., period) group in one grouped pass. "first" / "last" follow the
+    row order of df, so sort it by date first. Rows with a missing date are
+    dropped.
+    """
+    df = df.assign(**{period_col: period_start(df[date_col], freq, anchor)})
+    return df.groupby(list(by) + [period_col], as_index=False, observed=True).agg(rules)
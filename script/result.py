@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+import scipy as sp
+import scipy.sparse
+
+from .sparse_io import to_sparse
+
+
+class SVDFactors:
+    """
+    Low-rank component kept as its thresholded SVD, L = U @ diag(s) @ Vt.
+    """
+
+    def __init__(self, U, s, Vt):
+        self.U = U
+        self.s = s
+        self.Vt = Vt
+
+    @property
+    def shape(self):
+        return self.U.shape[0], self.Vt.shape[1]
+
+    @property
+    def rank(self):
+        return len(self.s)
+
+    def block(self, rows=slice(None), cols=slice(None)):
+        return (self.U[rows] * self.s) @ self.Vt[:, cols]
+
+    def to_dense(self):
+        return (self.U * self.s) @ self.Vt
+
+    @classmethod
+    def from_dense(cls, L, tol=1e-10):
+        U, s, Vt = np.linalg.svd(L, full_matrices=False)
+        keep = s > tol * max(s[0] if len(s) else 0.0, 1e-300)
+        return cls(U[:, keep], s[keep], Vt[keep])
+
+
+def _positions(labels, key):
+    # label-based selector -> positional selector
+    if key is None:
+        return slice(None)
+    if labels is None:
+        return np.atleast_1d(key) if np.isscalar(key) else key
+    if isinstance(key, slice):
+        return labels.slice_indexer(key.start, key.stop, key.step)
+    if np.isscalar(key):
+        return np.atleast_1d(labels.get_loc(key))
+    pos = labels.get_indexer(key)
+    if (pos < 0).any():
+        raise KeyError(f"Labels not found: {list(np.asarray(key)[pos < 0])}")
+    return pos
+
+
+class RPCAResult:
+    """
+    Result of an RPCA decomposition M = L + S with L kept in factored form
+    (SVDFactors for the SVT solvers, CURLowRank for IRCUR).
+
+    S is either stored as a scipy.sparse CSR matrix or, for sample-only
+    IRCUR, rebuilt on request by thresholding M - L over the requested block
+    only. sparse_block() returns dense blocks, sparse_matrix() CSR ones. Row/column selectors
+    are labels of index/columns (slices of labels are allowed), so one
+    continent or one date range is computed without forming the full L.
+    """
+
+    def __init__(self, low_rank, S=None, M=None, index=None, columns=None):
+        if S is None and M is None:
+            raise ValueError("Either S or the input matrix M is required")
+        self.low_rank = low_rank
+        self._S = None if S is None else to_sparse(S)
+        self._M = M
+        self.set_labels(index, columns)
+
+    @property
+    def shape(self):
+        return self.low_rank.shape
+
+    def set_labels(self, index=None, columns=None):
+        self.index = None if index is None else pd.Index(index)
+        self.columns = None if columns is None else pd.Index(columns)
+        return self
+
+    @property
+    def L(self):
+        return self.to_dense()[0]
+
+    @property
+    def S(self):
+        return self.sparse_block()
+
+    def lowrank_block(self, rows=None, cols=None):
+        r = _positions(self.index, rows)
+        c = _positions(self.columns, cols)
+        return self.low_rank.block(r, c)
+
+    def sparse_matrix(self, rows=None, cols=None):
+        r = _positions(self.index, rows)
+        c = _positions(self.columns, cols)
+        if self._S is not None:
+            return self._S[r][:, c]
+        return to_sparse(self.low_rank.sparse_block(self._M, r, c))
+
+    def sparse_block(self, rows=None, cols=None):
+        return self.sparse_matrix(rows, cols).toarray()
+
+    def _frame(self, values, rows, cols):
+        r = _positions(self.index, rows)
+        c = _positions(self.columns, cols)
+        index = None if self.index is None else self.index[r]
+        columns = None if self.columns is None else self.columns[c]
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    def lowrank_frame(self, rows=None, cols=None):
+        return self._frame(self.lowrank_block(rows, cols), rows, cols)
+
+    def sparse_frame(self, rows=None, cols=None):
+        return self._frame(self.sparse_block(rows, cols), rows, cols)
+
+    def to_dense(self):
+        return self.low_rank.to_dense(), self.sparse_block()
+
+    def __iter__(self):
+        # allows L, S = result
+        return iter(self.to_dense())
+
+    def save(self, path):
+        """
+        Compact on-disk form: the low-rank factors plus the nonzero entries
+        of S as (row, col, value) triplets, in a compressed .npz.
+        """
+        S = self.sparse_matrix().tocoo()
+        arrays = {
+            "shape": np.array(self.shape),
+            "S_rows": S.row.astype(np.int32),
+            "S_cols": S.col.astype(np.int32),
+            "S_vals": S.data,
+        }
+        if isinstance(self.low_rank, SVDFactors):
+            arrays.update(kind="svd", U=self.low_rank.U, s=self.low_rank.s, Vt=self.low_rank.Vt)
+        else:
+            arrays.update(kind="cur", C=self.low_rank.C, U_pinv=self.low_rank.U_pinv,
+                          R=self.low_rank.R, threshold=self.low_rank.threshold)
+        if self.index is not None:
+            arrays["index"] = np.asarray(self.index.astype(str), dtype=str)
+            arrays["index_is_datetime"] = isinstance(self.index, pd.DatetimeIndex)
+        if self.columns is not None:
+            arrays["columns"] = np.asarray(self.columns.astype(str), dtype=str)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            if str(f["kind"]) == "svd":
+                low_rank = SVDFactors(f["U"], f["s"], f["Vt"])
+            else:
+                from .ircur import CURLowRank
+                low_rank = CURLowRank(f["C"], f["U_pinv"], f["R"], float(f["threshold"]))
+            S = sp.sparse.csr_matrix((f["S_vals"], (f["S_rows"], f["S_cols"])),
+                                     shape=tuple(f["shape"]))
+            index = columns = None
+            if "index" in f:
+                index = pd.Index(f["index"])
+                if bool(f["index_is_datetime"]):
+                    index = pd.to_datetime(index)
+            if "columns" in f:
+                columns = pd.Index(f["columns"])
+        return cls(low_rank, S=S, index=index, columns=columns)
+
+    @classmethod
+    def from_dense(cls, L, S, index=None, columns=None):
+        """
+        Wrap a dense (L, S) pair, e.g. from an external solver such as
+        r_pca.R_pca, by factoring L once.
+        """
+        return cls(SVDFactors.from_dense(L), S=S, index=index, columns=columns)
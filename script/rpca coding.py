@@ -1,77 +1,65 @@
 import os
-import sys
-import subprocess
 import pandas as pd
 import numpy as np
 
 # ---------- Config ----------
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 INPUT = os.path.join(BASE, "clean_weekly_with_100k.csv")  # your latest file
-SAVE_MATRICES = True
+# also write the old *_matrix / *_lowrank / *_sparse CSVs
+EXPORT_CSV = False
 
-# ---------- Ensure RPCA available ----------
-try:
-    from r_pca import R_pca
-except ImportError:
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "r_pca"])
-    from r_pca import R_pca
+from robustpca.decomposition_io import save_decomposition
+from robustpca.stage_cache import StageCache
+from robustpca.tables import load_table
+
+# pivots and decompositions shared with the other pipeline scripts
+CACHE = StageCache(os.path.join(BASE, ".stage_cache"))
 
 # ---------- Load & prep ----------
-df = pd.read_csv(INPUT, encoding="cp1252")
-df["date"] = pd.to_datetime(df["date"])
+# typed through the columnar cache (dates parsed, weird numeric values
+# already missing)
+df = load_table(INPUT)
 df = df.sort_values("date")
 
 # Keep only what we need
 assert {"date", "continent", "who_region", "new_cases_per_100k"}.issubset(df.columns), \
     "Dataset must include date, continent, who_region, new_cases_per_100k."
 
-# Fill weird numeric issues
-df["new_cases_per_100k"] = pd.to_numeric(df["new_cases_per_100k"], errors="coerce").fillna(0.0)
+# Build the wide matrices (rows = dates, cols = groups) of every grouping
+# in one pass over the table
+GROUP_COLS = ["continent"] + (["who_region"] if "who_region" in df.columns else [])
+MATS = CACHE.pivots(df, "date", GROUP_COLS, "new_cases_per_100k", aggfunc="mean")
 
-def rpca_from_pivot(data: pd.DataFrame, group_col: str, value_col: str, name: str):
+def rpca_from_pivot(mat: pd.DataFrame, name: str):
     """
-    Build a date x group matrix, run RPCA, and save M, L, S.
+    Run RPCA on a date x group matrix (one of MATS), and save M, L, S (one
+    container, see decomposition_io) plus the factored result (.npz).
+    Returns the matrix and the RPCAResult.
     """
-    # Build wide matrix: rows = dates, cols = groups
-    mat = (data
-           .pivot_table(index="date", columns=group_col, values=value_col, aggfunc="mean")
-           .sort_index())
-
-    # Fill missing with 0; RPCA expects a dense numeric matrix.
-    mat = mat.fillna(0.0)
-
-    # Save original matrix
-    m_path = os.path.join(BASE, f"{name}_matrix.csv")
-    if SAVE_MATRICES:
-        mat.to_csv(m_path)
-
-    # Run Robust PCA
+    # Run Robust PCA on the observed entries only (missing reports stay
+    # NaN and are masked out rather than read as zero-case days), reusing
+    # a cached decomposition of the same matrix and settings
     M = mat.values.astype(float)
-    rpca = R_pca(M)
-    L, S = rpca.fit(max_iter=1000, iter_print=100)
-
-    low_rank = pd.DataFrame(L, index=mat.index, columns=mat.columns)
-    sparse   = pd.DataFrame(S, index=mat.index, columns=mat.columns)
+    result, = CACHE.decompose_many([M], "pcp", masks=[mat.notna().values], max_iter=1000)
+    result.set_labels(mat.index, mat.columns)
+    L, S = result
 
     # Save results
-    L_path = os.path.join(BASE, f"{name}_lowrank.csv")
-    S_path = os.path.join(BASE, f"{name}_sparse.csv")
-    low_rank.to_csv(L_path)
-    sparse.to_csv(S_path)
+    C_path = save_decomposition(os.path.join(BASE, name), M, L, S,
+                                mat.index, mat.columns,
+                                meta=dict(solver="pcp", masked=True, max_iter=1000),
+                                export_csv=EXPORT_CSV)
+    R_path = os.path.join(BASE, f"{name}.npz")
+    result.save(R_path)
 
-    print(f"✅ Saved: {m_path}")
-    print(f"✅ Saved: {L_path}")
-    print(f"✅ Saved: {S_path}")
+    print(f"✅ Saved: {C_path}")
+    print(f"✅ Saved: {R_path}")
 
-    return mat, low_rank, sparse
+    return mat, result
 
 # ---------- Run RPCA: by continent ----------
-M_cont, L_cont, S_cont = rpca_from_pivot(
-    df, group_col="continent", value_col="new_cases_per_100k", name="rpca_continent_cases_per100k"
-)
+M_cont, res_cont = rpca_from_pivot(MATS["continent"], name="rpca_continent_cases_per100k")
 
 # ---------- Run RPCA: by WHO region (if present) ----------
 if "who_region" in df.columns:
-    M_who, L_who, S_who = rpca_from_pivot(
-        df, group_col="who_region", value_col="new_cases_per_100k", name="rpca_who_cases_per100k"
-    )
+    M_who, res_who = rpca_from_pivot(MATS["who_region"], name="rpca_who_cases_per100k")
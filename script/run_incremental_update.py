@@ -0,0 +1,125 @@
+import os
+import numpy as np
+import pandas as pd
+
+from robustpca.decomposition_io import (container_path, load_decomposition, read_frame,
+                                        save_decomposition)
+from robustpca.ingest import dirty_periods, merge_rows, update_matrix, update_periods
+from robustpca.pcp import IALMState, pcp
+from robustpca.pipeline import Pipeline
+from robustpca.pivots import build_matrix
+from robustpca.resample import MEAN_RULES, SUM_RULES
+from robustpca.tables import load_table, typed_table
+from run_pipeline import build_stages
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
+STORE = os.path.join(BASE, "clean_weekly_with_100k.csv")        # cleaned daily rows
+BATCH = os.path.join(BASE, "new_daily_rows.csv")                # newly arrived rows
+MEAN_TABLE = os.path.join(BASE, "clean_weekly_MEAN_latest.csv")
+SUM_TABLE = os.path.join(BASE, "clean_weekly_SUM_latest.csv")
+DIRTY_LOG = os.path.join(BASE, "ingest_dirty_weeks.csv")
+STATE_DIR = os.path.join(BASE, "rpca_states")
+# also write the old *_matrix / *_lowrank / *_sparse CSVs
+EXPORT_CSV = False
+
+# same buckets as weekly_mean_pipeline.py / weekly_rpca_pipeline_latest.py
+FREQ = "W"
+WEEK_ANCHOR = "MON"
+
+
+def update_table(path, merged, changed, by, rules):
+    """
+    Recompute only the weekly rows of `path` (a table written by one of the
+    weekly pipelines) whose (by..., week) group received new or revised
+    daily rows; returns the updated table and those dirty groups.
+    """
+    dirty = dirty_periods(changed, by, FREQ, WEEK_ANCHOR)
+    table = update_periods(load_table(path), merged, dirty, rules, FREQ, WEEK_ANCHOR)
+    table.to_csv(path, index=False)
+    print(f"Updated {len(dirty)} weekly groups in {path}")
+    return table, dirty
+
+
+def update_and_decompose(table, dirty, group_col, prefix, aggfunc):
+    """
+    Refresh the dirty weeks of the week×group matrix in the M/L/S container
+    of `prefix` and re-run PCP on it, warm-started from the state saved by
+    the last run with the changed rows re-initialised (IALMState.extend).
+    Without a container, or when it holds a matrix of another aggfunc (the
+    weekly MEAN scripts write the same prefix), the matrix is rebuilt from
+    `table`; then, or without a saved state, or when the groups changed,
+    PCP starts cold.
+    """
+    mat_path = os.path.join(BASE, f"{prefix}_matrix.csv")
+    mat_old = None
+    if (os.path.exists(container_path(mat_path))
+            and load_decomposition(container_path(mat_path)).meta.get("aggfunc") == aggfunc):
+        mat_old = read_frame(mat_path)
+        mat, rows = update_matrix(mat_old, table, dirty, group_col, aggfunc=aggfunc)
+    else:
+        mat = build_matrix(table, "week", group_col, "new_cases_per_100k", aggfunc=aggfunc)
+        rows = np.arange(len(mat))
+    M = mat.values.astype(float)
+
+    state_path = os.path.join(STATE_DIR, f"{prefix}_state.npz")
+    state = None
+    warm = False
+    if (mat_old is not None and os.path.exists(state_path)
+            and mat.columns.equals(mat_old.columns)
+            and mat.index[:len(mat_old)].equals(mat_old.index)):
+        state = IALMState.load(state_path).extend(M, changed=rows)
+        warm = True
+
+    (L, S), state = pcp(M, state=state, max_iter=2000, return_state=True)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    state.save(state_path)
+
+    save_decomposition(os.path.join(BASE, prefix), M, L, S, mat.index, mat.columns,
+                       meta=dict(solver="pcp", max_iter=2000, aggfunc=aggfunc, warm=warm),
+                       export_csv=EXPORT_CSV)
+    print(f"{prefix}: {len(rows)} of {len(mat)} rows changed, PCP ({'warm' if warm else 'cold'}) "
+          f"took {state.n_iter} iterations")
+
+
+def ingest(batch_path):
+    """
+    Merge a batch of daily rows into the store (new (country, date) rows
+    appended, revised ones replaced) and propagate only what changed: the
+    dirty weeks of the weekly MEAN / SUM tables, the matching rows of the
+    weekly SUM matrices and their warm-started PCP decompositions.
+    The MEAN matrices and their PCP / IRLS / IRCUR decompositions
+    (run_pipeline.py) are not updated here; they are out of date in its
+    make-style graph from then on (the MEAN table is newer) and the stages
+    that will recompute them are listed at the end.
+    """
+    store = load_table(STORE)
+    batch = typed_table(pd.read_csv(batch_path, encoding="cp1252"))
+    merged, changed = merge_rows(store, batch)
+    print(f"Batch of {len(batch)} rows: {len(changed)} new or revised")
+    if changed.empty:
+        return
+    merged.to_csv(STORE, index=False)
+    # refresh the typed cache now, so the pipeline's resample stages stay
+    # current with the tables updated below instead of redoing them in full
+    load_table(STORE)
+    # same row order as the weekly pipelines, for the "last" rules
+    merged = merged.sort_values(["date", "country"], kind="stable")
+
+    dirty_log = dirty_periods(changed, ["continent", "who_region", "country"], FREQ, WEEK_ANCHOR)
+    dirty_log.to_csv(DIRTY_LOG, index=False)
+    print("Dirty weeks and groups:", DIRTY_LOG)
+
+    update_table(MEAN_TABLE, merged, changed, ["continent", "who_region", "country"], MEAN_RULES)
+    weekly, dirty = update_table(SUM_TABLE, merged, changed, ["continent", "who_region"],
+                                 SUM_RULES)
+    for group_col, prefix in (("continent", "rpca_continent_cases"),
+                              ("who_region", "rpca_who_cases")):
+        update_and_decompose(weekly, dirty, group_col, prefix, "sum")
+
+    stale = Pipeline(build_stages()).stale()
+    if stale:
+        print("Out of date until run_pipeline.py runs again:", ", ".join(stale))
+
+
+if __name__ == "__main__":
+    ingest(BATCH)
@@ -5,6 +5,7 @@ import pandas as pd
 # (make sure the repo folder containing robustpca/ is on your PYTHONPATH,
 #  or that this script lives in the same project and you use a local package install)
 from robustpca.ircur import IRCUR
+from robustpca.decomposition_io import read_frame, save_decomposition
 
 
 def run_ircur_on_matrix(
@@ -19,14 +20,32 @@ def run_ircur_on_matrix(
     resample: bool = True,
     max_iter: int = 1e4,
     verbose: bool = True,
+    sample_only: bool = False,
+    dtype=np.float64,
+    polish: bool = False,
+    random_state: int = 0,
+    n_starts: int = 1,
+    export_csv: bool = False,
 ) -> None:
     """
-    Load a date×region matrix from csv_path, run IRCUR, and
-    save low-rank and sparse components to CSV.
+    Load a date×region matrix from csv_path, run IRCUR, and save M and
+    the low-rank and sparse components in one container next to
+    out_lowrank_path (<prefix>_mls.npz, see decomposition_io);
+    export_csv=True also exports L and S to the two CSV paths.
+
+    sample_only=True runs IRCUR on the sampled rows/columns only and
+    builds the full L and S once at the end.
+
+    dtype=np.float32 runs the iterations in single precision; polish=True
+    finishes them in float64.
+
+    random_state seeds the row/column sampling so the saved outputs are
+    reproducible. n_starts > 1 runs that many seeded decompositions in
+    parallel and keeps the best one, printing the spread across runs.
     """
     # --- load data ---
-    df = pd.read_csv(csv_path, index_col=0)
-    # ensure numeric and drop rows with NaNs if any
+    df = read_frame(csv_path)
+    # ensure numeric; NaN entries are missing reports, which IRCUR masks out
     M = df.astype(float).values
     n, m = M.shape
 
@@ -36,32 +55,43 @@ def run_ircur_on_matrix(
 
     # pick a reasonable initial threshold scale
     # (you can tune this; 0.5 * max abs value is a decent starting point)
-    initial_threshold = 0.5 * np.max(np.abs(M))
+    initial_threshold = 0.5 * np.nanmax(np.abs(M))
 
     ircur = IRCUR()
-    L, S = ircur.decompose(
-        data_mat=M,
-        rank=rank,
-        nr=nr,
-        nc=nc,
-        initial_threshold=initial_threshold,
+    kwargs = dict(
         tol=tol,
         thresholding_decay=thresholding_decay,
         resample=resample,
         max_iter=max_iter,
         verbose=verbose,
+        sample_only=sample_only,
+        dtype=dtype,
+        polish=polish,
+        random_state=random_state,
     )
+    if n_starts > 1:
+        (L, S), report = ircur.decompose_multistart(
+            M, rank, nr, nc, initial_threshold, n_starts=n_starts, **kwargs
+        )
+        if verbose:
+            print(f"Best of {n_starts} runs: #{report['best']}, "
+                  f"objective std {report['objective_std']:.3g}, "
+                  f"max L spread {report['L_spread'].max():.3g}")
+    else:
+        L, S = ircur.decompose(M, rank, nr, nc, initial_threshold, **kwargs)
+    meta = dict(solver="ircur", rank=rank, nr=nr, nc=nc, tol=tol,
+                thresholding_decay=thresholding_decay, random_state=random_state,
+                n_starts=n_starts)
 
-    # --- save with same index/columns as input ---
-    L_df = pd.DataFrame(L, index=df.index, columns=df.columns)
-    S_df = pd.DataFrame(S, index=df.index, columns=df.columns)
-
-    L_df.to_csv(out_lowrank_path)
-    S_df.to_csv(out_sparse_path)
+    # --- save M, L, S with same index/columns as input, in one container ---
+    out_path = save_decomposition(out_lowrank_path, df.values.astype(float), L, S,
+                                  df.index, df.columns, meta=meta)
+    if export_csv:
+        pd.DataFrame(L, index=df.index, columns=df.columns).to_csv(out_lowrank_path)
+        pd.DataFrame(S, index=df.index, columns=df.columns).to_csv(out_sparse_path)
 
     if verbose:
-        print(f"Saved IRCUR low-rank to   {out_lowrank_path}")
-        print(f"Saved IRCUR sparse to     {out_sparse_path}")
+        print(f"Saved IRCUR M/L/S to      {out_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from robustpca.decomposition_io import container_path, load_decomposition, save_decomposition
+from robustpca.pipeline import Pipeline, Stage, run_script
+from robustpca.resample import MEAN_RULES, SUM_RULES, resample
+from robustpca.stage_cache import StageCache
+from robustpca.tables import cache_path, load_table
+from run_ircur_covid import run_ircur_on_matrix
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORE = os.path.join(BASE, "clean_weekly_with_100k.csv")        # cleaned daily rows
+MEAN_TABLE = os.path.join(BASE, "clean_weekly_MEAN_latest.csv")
+SUM_TABLE = os.path.join(BASE, "clean_weekly_SUM_latest.csv")
+METRICS = os.path.join(BASE, "rpca_pipeline_metrics.csv")
+
+# worker processes (None = one per CPU)
+N_JOBS = None
+
+# same buckets as weekly_mean_pipeline.py / weekly_rpca_pipeline_latest.py
+FREQ = "W"
+WEEK_ANCHOR = "MON"
+
+GROUPS = {"continent": "continent", "who": "who_region"}
+
+
+def out(name):
+    return os.path.join(BASE, name)
+
+
+def prefixes(p):
+    # the three decompositions of one group (prefix p), each saved as one
+    # M/L/S container (see decomposition_io)
+    return dict(
+        pcp=out(f"rpca_{p}_cases"),
+        irls=out(f"{p}_cases_per100k_irls"),
+        ircur=out(f"weekly_{p}_cases_per100k_ircur"),
+    )
+
+
+def outputs(p):
+    return {solver: container_path(prefix) for solver, prefix in prefixes(p).items()}
+
+
+# ===================== STAGES =====================
+
+def typed_store():
+    # typed columnar cache of the daily store, read by every later stage.
+    # The store itself is the already cleaned daily table; no script here
+    # writes it (daily_data_clean.py only copies the minimal export to
+    # merged_clean_daily.csv), so the graph starts from it.
+    load_table(STORE)
+
+
+def weekly_table(by, rules, path):
+    df = load_table(STORE).sort_values(["date", "country"], kind="stable")
+    resample(df, by, rules, freq=FREQ, anchor=WEEK_ANCHOR).to_csv(path, index=False)
+
+
+def pivot():
+    # the matrices of all groups in one pass over the weekly table
+    df = load_table(MEAN_TABLE).sort_values("week")
+    mats = StageCache(out(".stage_cache")).pivots(df, "week", list(GROUPS.values()),
+                                                  "new_cases_per_100k", aggfunc="mean")
+    for p, group_col in GROUPS.items():
+        mats[group_col].to_csv(out(f"rpca_{p}_cases_matrix.csv"))
+
+
+def decompose(solver, p):
+    mat = pd.read_csv(out(f"rpca_{p}_cases_matrix.csv"), index_col=0, parse_dates=True)
+    res, = StageCache(out(".stage_cache")).decompose_many([mat.values.astype(float)], solver)
+    save_decomposition(prefixes(p)[solver], mat.values, res.L, res.sparse_matrix(),
+                       mat.index, mat.columns, meta=dict(solver=solver, aggfunc="mean"))
+
+
+def ircur(p):
+    prefix = prefixes(p)["ircur"]
+    run_ircur_on_matrix(out(f"rpca_{p}_cases_matrix.csv"), f"{prefix}_lowrank.csv",
+                        f"{prefix}_sparse.csv", rank=2, nr=200, nc=6, verbose=False)
+
+
+def metrics():
+    # rank and sparsity of each decomposition, residual over the observed
+    # entries of M
+    rows = []
+    for p in GROUPS:
+        for solver, path in outputs(p).items():
+            dec = load_decomposition(path)
+            M, L, S = dec.M, dec.L, dec.S
+            M_fro = np.linalg.norm(np.nan_to_num(M), "fro") + 1e-12
+            s = np.linalg.svd(L, compute_uv=False)
+            rows.append(dict(
+                group=p, solver=solver,
+                L_rank=int(np.count_nonzero(s > 1e-8 * max(s[0] if len(s) else 0.0, 1e-300))),
+                sparsity=float(np.count_nonzero(S)) / S.size,
+                rel_error=float(np.linalg.norm(np.nan_to_num(M - L - S), "fro") / M_fro),
+            ))
+    pd.DataFrame(rows).to_csv(METRICS, index=False)
+
+
+def figure(script):
+    env = dict(os.environ, COVID_VAX_BASE=BASE, MPLBACKEND="Agg")
+    run_script(os.path.join(HERE, script), cwd=BASE, env=env)
+
+
+# ===================== GRAPH =====================
+
+def build_stages():
+    stages = [
+        Stage("typed_store", typed_store, [STORE], [cache_path(STORE)]),
+        Stage("resample_mean", weekly_table, [cache_path(STORE)], [MEAN_TABLE],
+              args=(["continent", "who_region", "country"], MEAN_RULES, MEAN_TABLE)),
+        Stage("resample_sum", weekly_table, [cache_path(STORE)], [SUM_TABLE],
+              args=(["continent", "who_region"], SUM_RULES, SUM_TABLE)),
+    ]
+    matrices = [out(f"rpca_{p}_cases_matrix.csv") for p in GROUPS]
+    stages.append(Stage("pivot", pivot, [MEAN_TABLE], matrices))
+    for p, matrix in zip(GROUPS, matrices):
+        files = outputs(p)
+        for solver in ("pcp", "irls"):
+            stages.append(Stage(f"{solver}_{p}", decompose, [matrix], [files[solver]],
+                                args=(solver, p)))
+        stages.append(Stage(f"ircur_{p}", ircur, [matrix], [files["ircur"]], args=(p,)))
+    decompositions = [path for p in GROUPS for path in outputs(p).values()]
+    stages.append(Stage("metrics", metrics, decompositions, [METRICS]))
+
+    # figures: {script: (inputs, png)}
+    figures = {
+        "plot_continent_lowrank_mean.py": (
+            [matrices[0], outputs("continent")["pcp"], outputs("continent")["ircur"]],
+            "continents_lowrank_weeklymean_pcp_ircur.png"),
+        "plot_continent_sparse_mean.py": (
+            [matrices[0], outputs("continent")["pcp"], outputs("continent")["ircur"]],
+            "continents_sparse_weeklymean_pcp_ircur.png"),
+        "plot_who_lowrank_weeklymean.py": (
+            [matrices[1], outputs("who")["pcp"], outputs("who")["ircur"]],
+            "who_lowrank_weeklymean_pcp_ircur.png"),
+        "plot_who_sparse_weeklymean.py": (
+            [matrices[1], outputs("who")["pcp"], outputs("who")["ircur"]],
+            "who_sparse_weeklymean_pcp_ircur.png"),
+        "plot_rpca_continents_original_lowrank_sparse.py": (
+            [matrices[0], outputs("continent")["pcp"]],
+            "rpca_continents_original_lowrank_sparse.png"),
+        "plot_rpca_who_original_lowrank_sparse.py": (
+            [matrices[1], outputs("who")["pcp"]],
+            "rpca_who_original_lowrank_sparse.png"),
+        "plot_original_cases_vs_vaccination.py": (
+            [SUM_TABLE], "original_cases_vs_vaccination.png"),
+    }
+    for script, (inputs, png) in figures.items():
+        name = "figure_" + os.path.splitext(script)[0].replace("plot_", "")
+        stages.append(Stage(name, figure, inputs, [out(png)], args=(script,)))
+    return stages
+
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv[1:]
+    report = Pipeline(build_stages()).run(n_jobs=N_JOBS, force=force)
+    print("\n=== Stage timings ===")
+    print(report[["stage", "status", "seconds"]].to_string(index=False))
+    print(f"Total stage time: {report['seconds'].sum():.2f}s")
@@ -0,0 +1,39 @@
+import numpy as np
+
+from robustpca.decomposition_io import read_frame
+from robustpca.sweep import sweep
+
+
+def sweep_matrix(csv_path: str, out_prefix: str, n_jobs: int = None) -> None:
+    """
+    Load a date×region matrix from csv_path and sweep PCP, IRLS and IRCUR
+    over their main parameters. Writes one table per solver to
+    {out_prefix}_{solver}_sweep.csv.
+    """
+    df = read_frame(csv_path)
+    M = df.astype(float).values
+    lam0 = 1.0 / np.sqrt(max(M.shape))
+    lams = [lam0 * f for f in (0.25, 0.5, 1.0, 2.0, 4.0)]
+
+    grids = {
+        "pcp": {"lam": lams, "rho": [1.2, 1.5]},
+        "irls": {"lam": lams, "rho": [1.2, 1.5]},
+        "ircur": {"rank": [1, 2, 3], "nr": [100, 200, 400], "nc": [3, 6],
+                  "thresholding_decay": [0.5, 0.65, 0.8]},
+    }
+    for solver, grid in grids.items():
+        table = sweep(M, grid, solver=solver, n_jobs=n_jobs)
+        out_path = f"{out_prefix}_{solver}_sweep.csv"
+        table.to_csv(out_path, index=False)
+        print(f"Saved {len(table)} {solver} runs to {out_path}")
+
+
+if __name__ == "__main__":
+    sweep_matrix(
+        csv_path="rpca_continent_cases_per100k_matrix.csv",
+        out_prefix="continent_cases_per100k",
+    )
+    sweep_matrix(
+        csv_path="rpca_who_cases_per100k_matrix.csv",
+        out_prefix="who_cases_per100k",
+    )
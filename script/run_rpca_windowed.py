@@ -0,0 +1,57 @@
+import pandas as pd
+
+from robustpca.decomposition_io import read_frame, save_decomposition
+from robustpca.windowed import windowed
+
+
+def run_windowed_on_matrix(
+    csv_path: str,
+    out_lowrank_path: str,
+    out_sparse_path: str,
+    solver: str = "pcp",
+    length: int = 365,
+    overlap: int = 90,
+    n_jobs: int = None,
+    cache_dir: str = "rpca_window_cache",
+    verbose: bool = True,
+    export_csv: bool = False,
+) -> None:
+    """
+    Load a date×region matrix from csv_path and decompose it in overlapping
+    windows of `length` days (see robustpca.windowed), so each era gets its
+    own low-rank structure. Windows already in cache_dir are reused, so a
+    rerun after new days arrive only solves the last window(s). Saves M, L
+    and S in one container next to out_lowrank_path (see decomposition_io);
+    export_csv=True also exports L and S to the two CSV paths.
+    """
+    # --- load data ---
+    df = read_frame(csv_path)
+    M = df.astype(float).values
+
+    L, S = windowed(M, length=length, overlap=overlap, solver=solver,
+                    n_jobs=n_jobs, cache_dir=cache_dir)
+    meta = dict(solver=f"windowed_{solver}", length=length, overlap=overlap)
+
+    # --- save M, L, S with same index/columns as input, in one container ---
+    out_path = save_decomposition(out_lowrank_path, df.values.astype(float), L, S,
+                                  df.index, df.columns, meta=meta)
+    if export_csv:
+        pd.DataFrame(L, index=df.index, columns=df.columns).to_csv(out_lowrank_path)
+        pd.DataFrame(S, index=df.index, columns=df.columns).to_csv(out_sparse_path)
+
+    if verbose:
+        print(f"Saved windowed {solver} M/L/S to {out_path}")
+
+
+if __name__ == "__main__":
+    run_windowed_on_matrix(
+        csv_path="rpca_continent_cases_per100k_matrix.csv",
+        out_lowrank_path="daily_continent_cases_per100k_windowed_lowrank.csv",
+        out_sparse_path="daily_continent_cases_per100k_windowed_sparse.csv",
+    )
+
+    run_windowed_on_matrix(
+        csv_path="rpca_who_cases_per100k_matrix.csv",
+        out_lowrank_path="daily_who_cases_per100k_windowed_lowrank.csv",
+        out_sparse_path="daily_who_cases_per100k_windowed_sparse.csv",
+    )
@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import pandas as pd
+import scipy as sp
+import scipy.sparse
+
+TRIPLET_COLUMNS = ("date", "group", "value")
+
+
+def to_sparse(S):
+    """
+    S (dense array, DataFrame or scipy.sparse matrix) as CSR, without
+    explicitly stored zeros.
+    """
+    if isinstance(S, pd.DataFrame):
+        sparse_cols = all(isinstance(t, pd.SparseDtype) for t in S.dtypes)
+        S = S.sparse.to_coo() if sparse_cols else S.to_numpy()
+    S = sp.sparse.csr_matrix(S, dtype=float)
+    S.eliminate_zeros()
+    return S
+
+
+def sparse_path(csv_path):
+    # compact sibling of a dense *_sparse.csv export
+    return os.path.splitext(csv_path)[0] + ".npz"
+
+
+def _labels(values, is_datetime):
+    labels = pd.Index(values)
+    return pd.to_datetime(labels) if is_datetime else labels
+
+
+def _frame(S, index, columns):
+    # one 0-filled SparseArray per column (DataFrame.sparse.from_spmatrix
+    # fills with NaN on some pandas versions)
+    S = S.tocsc()
+    return pd.DataFrame(
+        {j: pd.arrays.SparseArray.from_spmatrix(S[:, [j]]) for j in range(S.shape[1])},
+        index=index,
+    ).set_axis(columns, axis=1)
+
+
+def save_sparse(path, S, index=None, columns=None):
+    """
+    Save the sparse component S (n_dates x n_groups) with its labels.
+
+    A ".npz" path stores S in CSR form (data, indices, indptr, shape) plus
+    the index/columns as strings, compressed. Any other path is written as
+    a long CSV of the nonzero entries with columns date, group, value; the
+    triplets carry no shape, so load_sparse() needs the full labels to
+    restore all-zero rows and columns.
+    """
+    S = to_sparse(S)
+    if index is None:
+        index = pd.RangeIndex(S.shape[0])
+    if columns is None:
+        columns = pd.RangeIndex(S.shape[1])
+    index, columns = pd.Index(index), pd.Index(columns)
+
+    if path.endswith(".npz"):
+        np.savez_compressed(
+            path,
+            data=S.data,
+            indices=S.indices.astype(np.int32),
+            indptr=S.indptr.astype(np.int64),
+            shape=np.array(S.shape),
+            index=np.asarray(index.astype(str), dtype=str),
+            index_is_datetime=isinstance(index, pd.DatetimeIndex),
+            columns=np.asarray(columns.astype(str), dtype=str),
+        )
+        return
+
+    coo = S.tocoo()
+    order = np.lexsort((coo.col, coo.row))
+    date, group, value = TRIPLET_COLUMNS
+    pd.DataFrame({
+        date: index[coo.row[order]],
+        group: columns[coo.col[order]],
+        value: coo.data[order],
+    }).to_csv(path, index=False)
+
+
+def load_sparse(path, index=None, columns=None):
+    """
+    Read a file written by save_sparse() as a DataFrame with sparse (0-filled)
+    columns. index/columns, if given, reorder the result to those labels;
+    labels missing from the file become all-zero rows/columns. Use
+    DataFrame.sparse.to_coo() for the scipy.sparse matrix.
+    """
+    if path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as f:
+            S = sp.sparse.csr_matrix((f["data"], f["indices"], f["indptr"]),
+                                     shape=tuple(f["shape"]))
+            file_index = _labels(f["index"], bool(f["index_is_datetime"]))
+            file_columns = pd.Index(f["columns"])
+    else:
+        date, group, value = TRIPLET_COLUMNS
+        triplets = pd.read_csv(path, parse_dates=[date])
+        rows, file_index = pd.factorize(triplets[date], sort=True)
+        cols, file_columns = pd.factorize(triplets[group], sort=True)
+        S = sp.sparse.csr_matrix(
+            (triplets[value].to_numpy(dtype=float), (rows, cols)),
+            shape=(len(file_index), len(file_columns)),
+        )
+        file_index, file_columns = pd.Index(file_index), pd.Index(file_columns)
+
+    if index is not None or columns is not None:
+        S, file_index, file_columns = _reindex(S, file_index, file_columns, index, columns)
+    return _frame(S, file_index, file_columns)
+
+
+def _reindex(S, file_index, file_columns, index, columns):
+    # select/reorder CSR rows and columns by label, zero-filling the rest
+    index = file_index if index is None else pd.Index(index)
+    columns = file_columns if columns is None else pd.Index(columns)
+    coo = S.tocoo()
+    row_map = index.get_indexer(file_index)
+    col_map = columns.get_indexer(file_columns)
+    keep = (row_map[coo.row] >= 0) & (col_map[coo.col] >= 0)
+    S = sp.sparse.csr_matrix(
+        (coo.data[keep], (row_map[coo.row[keep]], col_map[coo.col[keep]])),
+        shape=(len(index), len(columns)),
+    )
+    return S, index, columns
+
+
+def read_sparse_frame(csv_path, index=None, columns=None):
+    """
+    Sparse component saved as csv_path: read it from its decomposition
+    container (see decomposition_io.read_frame) or its compact .npz
+    sibling (see sparse_path) when one exists, else the dense CSV export.
+    """
+    from .decomposition_io import container_current, container_path, load_decomposition
+
+    if container_current(csv_path):
+        frame = load_decomposition(container_path(csv_path)).frame("sparse")
+        S, file_index, file_columns = to_sparse(frame), frame.index, frame.columns
+        if index is not None or columns is not None:
+            S, file_index, file_columns = _reindex(S, file_index, file_columns, index, columns)
+        return _frame(S, file_index, file_columns)
+    npz = sparse_path(csv_path)
+    if os.path.exists(npz):
+        return load_sparse(npz, index, columns)
+    frame = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+    if index is not None or columns is not None:
+        frame = frame.reindex(index=index, columns=columns, fill_value=0.0)
+    return frame
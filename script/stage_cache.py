@@ -0,0 +1,234 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .pcp import solve_many
+from .pivots import build_matrices
+from .result import RPCAResult
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """
+    Hash of the package sources: any change to the solvers or the stage
+    code gives new cache keys.
+    """
+    h = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def fingerprint(obj, h=None):
+    """
+    Content hash of a stage input: arrays by dtype, shape and bytes,
+    DataFrames / Series by their values and labels, containers
+    recursively, anything else by repr(). Returns the hex digest.
+    """
+    top = h is None
+    h = hashlib.sha1() if top else h
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(repr((type(obj).__name__, obj.shape, [str(t) for t in np.atleast_1d(obj.dtypes)],
+                       getattr(obj, "columns", None) is not None and list(obj.columns)))
+                 .encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=repr):
+            h.update(repr(key).encode())
+            fingerprint(obj[key], h)
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            fingerprint(item, h)
+    else:
+        h.update(repr(obj).encode())
+    return h.hexdigest() if top else None
+
+
+def _frame_arrays(df):
+    # a DataFrame with simple labels as plain arrays (no pickle)
+    return dict(
+        values=df.to_numpy(dtype=float),
+        index=df.index.to_numpy() if isinstance(df.index, pd.DatetimeIndex)
+        else np.asarray(df.index.astype(str), dtype=str),
+        columns=np.asarray(df.columns.astype(str), dtype=str),
+        names=np.asarray(json.dumps([df.index.name, df.columns.name])),
+    )
+
+
+def _arrays_frame(f):
+    index_name, columns_name = json.loads(str(f["names"]))
+    return pd.DataFrame(f["values"],
+                        index=pd.Index(f["index"], name=index_name),
+                        columns=pd.Index(f["columns"], name=columns_name), copy=False)
+
+
+class StageCache:
+    """
+    Content-addressed store for pipeline artifacts (pivots, decompositions,
+    metric tables) in cache_dir. Keys hash the stage name, the package
+    code_version(), the input data and the stage parameters, so every
+    script that needs the same artifact computes it once. Files are
+    replaced atomically, and a hit refreshes the file's mtime; when the
+    directory grows beyond max_bytes the least recently used files are
+    deleted.
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 ** 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, stage, inputs=(), params=None):
+        h = hashlib.sha1()
+        h.update(f"{stage}\0{code_version()}\0".encode())
+        fingerprint(list(inputs), h)
+        fingerprint(dict(params or {}), h)
+        return f"{stage}-{h.hexdigest()}"
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def hit(self, key):
+        # path of a cached artifact (marked as just used), or None
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def write(self, key, save):
+        """
+        Store an artifact: save(path) writes it to a temporary file, which
+        then replaces the entry for key. Evicts old entries if needed.
+        """
+        fd, tmp = tempfile.mkstemp(suffix=".npz", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            save(tmp)
+            os.replace(tmp, self.path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.evict(keep=self.path(key))
+
+    def evict(self, keep=None):
+        # delete least recently used entries until the total fits max_bytes
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.npz")):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.cache_dir, "*.npz")):
+            os.remove(path)
+
+    def pivots(self, df, index, columns, values, aggfunc="mean"):
+        """
+        The index x column matrices of df for several group columns (see
+        pivots.build_matrices), each cached on the three columns it reads.
+        The ones not in the cache are built together in one pass. Returns
+        {column: matrix}.
+        """
+        mats, keys = {}, {}
+        for column in columns:
+            params = dict(index=index, columns=column, values=values, aggfunc=aggfunc)
+            # row labels do not matter to the pivot, row order (float sums) does
+            keys[column] = self.key("pivot", [df[[index, column, values]].reset_index(drop=True)],
+                                    params)
+            path = self.hit(keys[column])
+            if path is not None:
+                with np.load(path, allow_pickle=False) as f:
+                    mats[column] = _arrays_frame(f)
+        todo = [column for column in columns if column not in mats]
+        if todo:
+            built = build_matrices(df, index, todo, values, aggfunc)
+            for column in todo:
+                mat = mats[column] = built[column, values, aggfunc]
+                self.write(keys[column], lambda p: np.savez(p, **_frame_arrays(mat)))
+        return {column: mats[column] for column in columns}
+
+    def pivot(self, df, index, columns, values, aggfunc="mean"):
+        """
+        df.pivot_table(index=index, columns=columns, values=values,
+        aggfunc=aggfunc, observed=True).sort_index() (built by
+        pivots.build_matrix), cached on the three columns it reads.
+        """
+        return self.pivots(df, index, [columns], values, aggfunc)[columns]
+
+    def decompose_many(self, Ms, solver="pcp", masks=None, **kwargs):
+        """
+        solve_many(Ms, solver, masks, **kwargs) through the cache: only the
+        matrices without a stored result (same data, mask, solver and
+        parameters) are solved, still batched. Returns RPCAResults.
+        """
+        masks = [None] * len(Ms) if masks is None else list(masks)
+        # verbosity does not change the result
+        params = {k: v for k, v in kwargs.items() if k != "verbose"}
+        params["solver"] = solver
+        keys = [self.key("decompose", [np.asarray(M, dtype=float), mask], params)
+                for M, mask in zip(Ms, masks)]
+        results = [None] * len(Ms)
+        todo = []
+        for i, key in enumerate(keys):
+            path = self.hit(key)
+            if path is None:
+                todo.append(i)
+            else:
+                results[i] = RPCAResult.load(path)
+        if todo:
+            solved = solve_many([Ms[i] for i in todo], solver,
+                                masks=[masks[i] for i in todo], **kwargs)
+            for i, res in zip(todo, solved):
+                results[i] = res
+                self.write(keys[i], res.save)
+        return results
+
+    def load_records(self, key):
+        # cached metric rows for key, or None
+        path = self.hit(key)
+        if path is None:
+            return None
+        with np.load(path, allow_pickle=False) as f:
+            return json.loads(str(f["records"]))
+
+    def store_records(self, key, rows):
+        text = json.dumps(rows, default=lambda x: x.item())
+        self.write(key, lambda p: np.savez(p, records=np.asarray(text)))
+
+    def records(self, stage, fn, inputs=(), params=None):
+        """
+        fn(*inputs, **params) for a stage returning metric rows (a list of
+        flat dicts, e.g. one sweep task), cached as JSON.
+        """
+        key = self.key(stage, inputs, params)
+        rows = self.load_records(key)
+        if rows is None:
+            rows = fn(*inputs, **(params or {}))
+            self.store_records(key, rows)
+        return rows
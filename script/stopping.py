@@ -0,0 +1,139 @@
+import numpy as np
+import scipy as sp
+import scipy.stats
+
+
+class Residual:
+    """
+    Residual of one convergence check, computed once by the solver and
+    shared by the test and the log line: the blocks of M - L - S the solver
+    measures (the whole R for pcp/irls_rpca, the sampled rows and columns
+    for IRCUR), the norm they are compared to and, when available, the
+    current singular values of L. sq_norms are the squared Frobenius norms
+    of the blocks when the solver already has them (the fused kernels
+    accumulate them while writing R).
+    """
+
+    def __init__(self, blocks, ref_norm, s=None, sq_norms=None):
+        self.blocks = blocks
+        self.ref_norm = ref_norm
+        self.s = s
+        self.sq_norms = sq_norms
+
+    def relative(self):
+        # sum of block Frobenius norms over the reference norm
+        if self.sq_norms is not None:
+            return sum(np.sqrt(q) for q in self.sq_norms) / self.ref_norm
+        return sum(np.linalg.norm(B) for B in self.blocks) / self.ref_norm
+
+    def sampled(self, n_samples, z, rng):
+        """
+        Estimate of relative() from n_samples random entries per block,
+        and a one-sided upper confidence bound at z standard errors of the
+        mean squared entry. Blocks with no more than n_samples entries are
+        measured exactly.
+        """
+        est = upper = 0.0
+        for B in self.blocks:
+            flat = B.reshape(-1)
+            if flat.size <= n_samples:
+                est += np.linalg.norm(flat)
+                upper += np.linalg.norm(flat)
+                continue
+            sq = flat[rng.integers(0, flat.size, n_samples)] ** 2
+            mean = sq.mean()
+            se = sq.std(ddof=1) / np.sqrt(n_samples)
+            est += np.sqrt(flat.size * mean)
+            upper += np.sqrt(flat.size * (mean + z * se))
+        return est / self.ref_norm, upper / self.ref_norm
+
+
+class Exact:
+    """
+    Stop when the relative residual is below tol, checked every iteration.
+    """
+
+    every = 1
+
+    def __init__(self, tol=1e-7):
+        self.tol = tol
+
+    def start(self):
+        # called by the solver before its first check
+        pass
+
+    def due(self, it):
+        return (it + 1) % self.every == 0
+
+    def check(self, residual):
+        """
+        Returns (converged, error estimate for the log).
+        """
+        err = residual.relative()
+        return err < self.tol, err
+
+
+class Every(Exact):
+    """
+    Exact test, but only on every k-th iteration; the solver skips building
+    the residual in between.
+    """
+
+    def __init__(self, tol=1e-7, k=10):
+        super().__init__(tol)
+        self.every = k
+
+
+class Sampled(Exact):
+    """
+    Relative residual estimated from n_samples random entries per residual
+    block (O(n_samples) instead of O(n * m) per check). Stops when the upper
+    bound of the one-sided confidence interval is below tol; the point
+    estimate goes to the log. Large outliers make the squared entries
+    heavy-tailed, so the bound is approximate for very small samples.
+    """
+
+    def __init__(self, tol=1e-7, n_samples=1000, confidence=0.95, k=1, random_state=None):
+        super().__init__(tol)
+        self.every = k
+        self.n_samples = n_samples
+        self.z = sp.stats.norm.ppf(confidence)
+        self.rng = np.random.default_rng(random_state)
+
+    def check(self, residual):
+        est, upper = residual.sampled(self.n_samples, self.z, self.rng)
+        return upper < self.tol, est
+
+
+class SingularValueChange(Exact):
+    """
+    Stop when the singular values of L change by less than tol (relative,
+    Euclidean) between two checks. Says nothing about M = L + S itself, so
+    it suits runs where the low-rank part is what matters. IRCUR reports
+    the singular values of its sampled core, which only settle with
+    resample=False.
+    """
+
+    def __init__(self, tol=1e-5, k=1):
+        super().__init__(tol)
+        self.every = k
+        self._s_prev = None
+
+    def start(self):
+        self._s_prev = None
+
+    def check(self, residual):
+        s, s_prev = residual.s, self._s_prev
+        self._s_prev = None if s is None else np.array(s, dtype=float)
+        if s is None or s_prev is None:
+            return False, np.inf
+        n = max(len(s), len(s_prev))
+        s = np.pad(np.asarray(s, dtype=float), (0, n - len(s)))
+        s_prev = np.pad(s_prev, (0, n - len(s_prev)))
+        change = np.linalg.norm(s - s_prev) / (np.linalg.norm(s_prev) + 1e-12)
+        return change < self.tol, change
+
+
+def criterion(stopping, tol):
+    # the criterion a solver uses: the given one, or the exact test at tol
+    return Exact(tol) if stopping is None else stopping
@@ -0,0 +1,180 @@
+import numpy as np
+import scipy as sp
+import scipy.sparse.linalg
+
+SVD_METHODS = ("full", "auto", "gram", "qr", "randomized", "lanczos")
+
+# "auto" takes the Gram path once max(n, m) >= SKINNY_RATIO * min(n, m)
+SKINNY_RATIO = 4
+# Gram singular values below GRAM_RTOL * s_max are not trusted
+GRAM_RTOL = 1e-4
+
+
+def _swap(A):
+    return np.swapaxes(A, -1, -2)
+
+
+def is_skinny(shape, ratio=SKINNY_RATIO):
+    n, m = shape[-2:]
+    return max(n, m) >= ratio * min(n, m)
+
+
+def full_svd(X):
+    return np.linalg.svd(X, full_matrices=False)
+
+
+def qr_svd(X):
+    """
+    Thin SVD through a QR of the long side followed by an SVD of the small
+    triangular factor. Works on stacks of matrices.
+    """
+    wide = X.shape[-2] < X.shape[-1]
+    A = _swap(X) if wide else X
+    Q, R = np.linalg.qr(A)
+    Ur, s, Vt = np.linalg.svd(R)
+    U = Q @ Ur
+    if wide:
+        return _swap(Vt), s, _swap(U)
+    return U, s, Vt
+
+
+def gram_svd(X):
+    """
+    Thin SVD of a tall-skinny (or short-wide) X from the eigendecomposition
+    of the small min(n, m) x min(n, m) Gram matrix. Works on stacks.
+
+    Squaring the matrix squares its condition number, so singular values
+    below cutoff = GRAM_RTOL * s_max (and their vectors) are unreliable;
+    in float32 the cutoff is raised to 10 * sqrt(eps) * s_max.
+    Returns (U, s, Vt, cutoff); callers must fall back to a full SVD when a
+    component under the cutoff is needed.
+    """
+    wide = X.shape[-2] < X.shape[-1]
+    A = _swap(X) if wide else X
+    w, V = np.linalg.eigh(_swap(A) @ A)
+    w, V = w[..., ::-1], V[..., ::-1]
+    s = np.sqrt(np.maximum(w, 0.0))
+    rtol = max(GRAM_RTOL, 10 * np.sqrt(np.finfo(s.dtype).eps))
+    cutoff = rtol * s[..., :1]
+    U = (A @ V) / np.maximum(s, np.maximum(cutoff, np.finfo(s.dtype).tiny))[..., None, :]
+    if wide:
+        return V, s, _swap(U), cutoff[..., 0]
+    return U, s, _swap(V), cutoff[..., 0]
+
+
+def gram_needs_fallback(s, tau, cutoff):
+    # an unreliable component could survive thresholding at tau
+    cutoff = np.asarray(cutoff)[..., None]
+    return np.any((s < cutoff) & (tau < cutoff), axis=-1)
+
+
+def truncated_svd(X, k, method="auto"):
+    """
+    Leading k singular triplets of X. "auto" uses the Gram path on
+    tall-skinny / short-wide matrices and falls back to the full SVD when
+    the k-th singular value is under the Gram accuracy cutoff.
+    """
+    if method == "auto":
+        method = "gram" if is_skinny(X.shape) else "full"
+    if method == "gram":
+        U, s, Vt, cutoff = gram_svd(X)
+        if k > len(s) or s[k - 1] < cutoff:
+            U, s, Vt = full_svd(X)
+    elif method == "qr":
+        U, s, Vt = qr_svd(X)
+    else:
+        return partial_svd(X, k, method=method)
+    return U[:, :k], s[:k], Vt[:k]
+
+
+def randomized_svd(X, k, n_oversamples=10, n_iter=4, random_state=None):
+    """
+    Top-k SVD via a randomized range finder (Halko, Martinsson & Tropp)
+    with a few power iterations to sharpen the spectrum.
+    """
+    n, m = X.shape
+    p = min(k + n_oversamples, n, m)
+    rng = np.random.default_rng(random_state)
+
+    Q, _ = np.linalg.qr(X @ rng.standard_normal((m, p)))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(X.T @ Q)
+        Q, _ = np.linalg.qr(X @ Q)
+
+    Ub, s, Vt = np.linalg.svd(Q.T @ X, full_matrices=False)
+    return (Q @ Ub[:, :k]), s[:k], Vt[:k]
+
+
+def lanczos_svd(X, k):
+    # ARPACK needs k < min(n, m); fall back to the dense SVD otherwise
+    if k >= min(X.shape) - 1:
+        U, s, Vt = full_svd(X)
+        return U[:, :k], s[:k], Vt[:k]
+    U, s, Vt = sp.sparse.linalg.svds(X, k=k)
+    order = np.argsort(s)[::-1]
+    return U[:, order], s[order], Vt[order]
+
+
+def partial_svd(X, k, method="randomized"):
+    """
+    Leading k singular triplets of X using the given backend.
+    """
+    k = max(1, min(int(k), min(X.shape)))
+    if method == "full":
+        U, s, Vt = full_svd(X)
+        return U[:, :k], s[:k], Vt[:k]
+    if method == "randomized":
+        return randomized_svd(X, k)
+    if method == "lanczos":
+        return lanczos_svd(X, k)
+    raise ValueError(f"Unknown svd method {method!r}; expected one of {SVD_METHODS}")
+
+
+def predict_rank(svp, sv, n):
+    """
+    Rank prediction from the IALM paper (Lin, Chen & Ma 2010): if fewer
+    singular values survived than were computed, ask for one more next time,
+    otherwise grow the window by 5% of the smaller dimension.
+    """
+    if svp < sv:
+        return min(svp + 1, n)
+    return min(svp + max(1, round(0.05 * n)), n)
+
+
+def thresholded_svd(X, tau, method="full", k=None):
+    """
+    Singular triplets of X that survive thresholding at tau (scalar or a
+    per-component vector). Partial backends start from k components and
+    double k until the smallest computed value falls below its threshold,
+    so the result matches the full SVD.
+
+    "gram"/"auto" use the shape-aware fast path of truncated_svd().
+
+    Returns (U, s_thr, Vt, svp) where svp is the number of surviving values.
+    """
+    n = min(X.shape)
+    tau = np.asarray(tau, dtype=float)
+
+    if method == "auto":
+        method = "gram" if is_skinny(X.shape) else "full"
+
+    if method == "gram":
+        U, s, Vt, cutoff = gram_svd(X)
+        if gram_needs_fallback(s, tau, cutoff):
+            U, s, Vt = full_svd(X)
+    elif method == "qr":
+        U, s, Vt = qr_svd(X)
+    elif method == "full" or k is None or k >= n:
+        U, s, Vt = full_svd(X)
+    else:
+        while True:
+            U, s, Vt = partial_svd(X, k, method=method)
+            tau_k = tau if tau.ndim == 0 else tau[:len(s)]
+            if k >= n or np.any(s <= tau_k):
+                break
+            k = min(2 * k, n)
+
+    tau_k = tau if tau.ndim == 0 else tau[:len(s)]
+    s_thr = np.maximum(s - tau_k, 0.0)
+    svp = int(np.count_nonzero(s_thr))
+    return U[:, :svp], s_thr[:svp], Vt[:svp], svp
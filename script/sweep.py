@@ -0,0 +1,122 @@
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .ircur import IRCUR
+from .pcp import irls_rpca, pcp
+
+SOLVERS = {"pcp": pcp, "irls": irls_rpca, "ircur": None}
+
+
+def _grid_points(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _metrics(M, L, S, n_iter, seconds):
+    # residual over the observed (non-NaN) entries of M
+    M_fro = np.linalg.norm(np.nan_to_num(M), "fro") + 1e-12
+    s = np.linalg.svd(L, compute_uv=False)
+    return dict(
+        L_rank=int(np.count_nonzero(s > 1e-8 * max(s[0] if len(s) else 0.0, 1e-300))),
+        sparsity=float(np.count_nonzero(S)) / S.size,
+        rel_error=float(np.linalg.norm(np.nan_to_num(M - L - S), "fro") / M_fro),
+        n_iter=int(n_iter),
+        seconds=seconds,
+    )
+
+
+def _run_lam_path(M, solver, params, lams, warm_start, solver_kwargs):
+    # one worker task: the lam values of one grid point, solved in order;
+    # with warm_start each starts from the previous solution
+    func = SOLVERS[solver]
+    mu0 = params.get("mu") or 1.25 / (np.linalg.norm(np.nan_to_num(M), 2) + 1e-12)
+    rows = []
+    state = None
+    for lam in lams:
+        start = time.perf_counter()
+        if state is not None:
+            # keep L, S and the dual, restart the penalty schedule
+            state.mu = mu0
+        (L, S), new_state = func(M, lam=lam, state=state, return_state=True,
+                                 **params, **solver_kwargs)
+        seconds = time.perf_counter() - start
+        rows.append(dict(params, lam=lam, **_metrics(M, L, S, new_state.n_iter, seconds)))
+        state = new_state if warm_start else None
+    return rows
+
+
+def _run_ircur(M, params, solver_kwargs):
+    kwargs = dict(nr=M.shape[0], nc=M.shape[1], initial_threshold=0.5 * np.nanmax(np.abs(M)))
+    kwargs.update(solver_kwargs)
+    kwargs.update(params)
+    start = time.perf_counter()
+    (L, S), state = IRCUR().decompose(M, return_state=True, **kwargs)
+    seconds = time.perf_counter() - start
+    return [dict(params, **_metrics(M, L, S, state.it, seconds))]
+
+
+def sweep(M, grid, solver="pcp", n_jobs=None, warm_start=False, cache=None, **solver_kwargs):
+    """
+    Run solver ("pcp", "irls" or "ircur") on M for every combination of the
+    parameter grid (dict of name -> list of values) on a process pool of
+    n_jobs workers (n_jobs=1 runs in this process).
+
+    For pcp/irls the "lam" values (default: the usual 1/sqrt(max(n, m)))
+    form a path: each combination of the other parameters is one task that
+    solves its lam values in decreasing order. warm_start=True starts each
+    lam from the previous solution (L, S and dual kept, penalty schedule
+    restarted); the geometric IALM freezes wherever mu saturates, so this
+    does not save iterations and its rows can differ from cold solves by
+    tens of percent in L. It is off by default.
+    IRCUR points are independent; nr/nc default to the full matrix and
+    initial_threshold to 0.5 * max|M|, as in run_ircur_on_matrix.
+    Remaining keyword arguments go to every solver call. NaN entries of M
+    are treated as missing (see pcp(mask=...)). With a StageCache as cache,
+    the rows of tasks already run on the same data and settings are reused
+    (wall times included) and only the others are solved.
+
+    Returns a DataFrame with one row per grid point: the parameters, the
+    rank of L (L_rank), the fraction of nonzeros in S, the relative reconstruction
+    error ||M - L - S|| / ||M|| over the observed entries, the iteration
+    count and the wall time.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}; expected one of {list(SOLVERS)}")
+    if solver == "irls" and ("mu" in grid or "mu" in solver_kwargs):
+        # irls_rpca sets its own initial penalty and takes no mu
+        raise ValueError("solver='irls' has no 'mu' parameter; sweep mu with solver='pcp'")
+    M = np.asarray(M, dtype=float)
+    grid = dict(grid)
+
+    if solver == "ircur":
+        tasks = [(_run_ircur, M, params, solver_kwargs) for params in _grid_points(grid)]
+    else:
+        lams = grid.pop("lam", [1.0 / np.sqrt(max(M.shape))])
+        lams = sorted(lams, reverse=True)
+        tasks = [(_run_lam_path, M, solver, params, lams, warm_start, solver_kwargs)
+                 for params in _grid_points(grid)]
+
+    results = [None] * len(tasks)
+    keys = [None] * len(tasks)
+    if cache is not None:
+        for i, task in enumerate(tasks):
+            keys[i] = cache.key("sweep", task[1:], {"task": task[0].__name__})
+            results[i] = cache.load_records(keys[i])
+    todo = [i for i, rows in enumerate(results) if rows is None]
+
+    if n_jobs == 1:
+        solved = [tasks[i][0](*tasks[i][1:]) for i in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(*tasks[i]) for i in todo]
+            solved = [f.result() for f in futures]
+    for i, rows in zip(todo, solved):
+        results[i] = rows
+        if cache is not None:
+            cache.store_records(keys[i], rows)
+
+    return pd.DataFrame([row for rows in results for row in rows])
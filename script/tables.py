@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (Parquet support in pandas)
+except ImportError:  # npz cache instead
+    pyarrow = None
+
+HAVE_PARQUET = pyarrow is not None
+
+CATEGORICAL_COLUMNS = ("country", "continent", "who_region")
+DATE_COLUMNS = ("date", "week")
+NUMERIC_COLUMNS = ("new_cases", "new_cases_per_100k", "pfv_per_hundred", "population")
+
+# bump when the typing rules change, so old caches are rebuilt
+_CACHE_VERSION = 1
+
+
+def _parse_dates(col):
+    # one explicit format for the whole column (M/D/YYYY exports or ISO),
+    # instead of pandas inferring it
+    first = col.dropna().astype(str)
+    fmt = "%m/%d/%Y" if len(first) and "/" in first.iloc[0] else "ISO8601"
+    return pd.to_datetime(col, format=fmt)
+
+
+def typed_table(df):
+    """
+    Column types of the cleaned tables: dates parsed, country / continent /
+    WHO region (and any other text column) as categoricals, the case,
+    vaccination and population columns numeric with unparseable values
+    as NaN.
+    """
+    df = df.copy()
+    for name in df.columns:
+        if name in DATE_COLUMNS:
+            df[name] = _parse_dates(df[name])
+        elif name in NUMERIC_COLUMNS:
+            df[name] = pd.to_numeric(df[name], errors="coerce")
+        elif name in CATEGORICAL_COLUMNS or not pd.api.types.is_numeric_dtype(df[name]):
+            df[name] = df[name].astype("category")
+    return df
+
+
+def cache_path(csv_path, cache_dir=None):
+    """
+    Cache file of csv_path: <stem>.parquet (with pyarrow) or <stem>.npz in
+    cache_dir, by default a .cache directory next to the CSV.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), ".cache")
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, stem + (".parquet" if HAVE_PARQUET else ".npz"))
+
+
+def file_sha1(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_stamp(csv_path, check):
+    st = os.stat(csv_path)
+    stamp = dict(version=_CACHE_VERSION, size=st.st_size)
+    if check == "hash":
+        stamp["sha1"] = file_sha1(csv_path)
+    else:
+        stamp["mtime_ns"] = st.st_mtime_ns
+    return stamp
+
+
+def _save_npz(path, df):
+    # one array per column (categoricals as codes + categories, dates as
+    # datetime64), so the file loads without pickle
+    arrays, kinds = {}, {}
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            kinds[name] = "category"
+            arrays[f"c{i}"] = col.cat.codes.to_numpy()
+            arrays[f"k{i}"] = np.asarray(col.cat.categories.astype(str), dtype=str)
+        elif pd.api.types.is_datetime64_any_dtype(col):
+            kinds[name] = "datetime"
+            arrays[f"c{i}"] = col.to_numpy()
+        else:
+            kinds[name] = "numeric"
+            arrays[f"c{i}"] = col.to_numpy()
+    arrays["columns"] = np.asarray(json.dumps([[name, kinds[name]] for name in df.columns]))
+    np.savez(path, **arrays)
+
+
+def _load_npz(path):
+    with np.load(path, allow_pickle=False) as f:
+        data = {}
+        for i, (name, kind) in enumerate(json.loads(str(f["columns"]))):
+            if kind == "category":
+                data[name] = pd.Categorical.from_codes(f[f"c{i}"], categories=f[f"k{i}"])
+            else:
+                data[name] = f[f"c{i}"]
+    return pd.DataFrame(data)
+
+
+def load_table(csv_path, cache_dir=None, check="mtime", encoding="cp1252"):
+    """
+    Read one of the cleaned CSV tables (daily, weekly SUM / MEAN) typed as
+    in typed_table(), through a columnar cache: the first call parses the
+    CSV and writes cache_path(csv_path, cache_dir); later calls read the
+    cache while it is up to date. check="mtime" invalidates it when the
+    CSV's modification time or size changes, check="hash" only when its
+    content (SHA-1) does, e.g. after copying the data around.
+    """
+    if check not in ("mtime", "hash"):
+        raise ValueError(f"check must be 'mtime' or 'hash', got {check!r}")
+    path = cache_path(csv_path, cache_dir)
+    meta_path = path + ".json"
+    stamp = _source_stamp(csv_path, check)
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            cached = json.load(f)
+        if all(cached.get(key) == value for key, value in stamp.items()):
+            return pd.read_parquet(path) if HAVE_PARQUET else _load_npz(path)
+
+    df = typed_table(pd.read_csv(csv_path, encoding=encoding))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if HAVE_PARQUET:
+        df.to_parquet(path, index=False)
+    else:
+        _save_npz(path, df)
+    # record both stamps, so either check can reuse the cache later
+    stamp.update(_source_stamp(csv_path, "hash" if check == "mtime" else "mtime"))
+    with open(meta_path, "w") as f:
+        json.dump(stamp, f)
+    return df
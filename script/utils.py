@@ -0,0 +1,13 @@
+import functools
+import time
+
+
+def time_printer(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.time()
+        result = func(*args, **kwargs)
+        print(f"{func.__name__} took {time.time() - start:.3f} s")
+        return result
+
+    return wrapper
@@ -1,23 +1,22 @@
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.tables import load_table
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 WEEKLY_FILE = os.path.join(BASE, "clean_weekly_MEAN_latest.csv")
 
 # ----------------------------------------------------
 # Load weekly mean data
 # ----------------------------------------------------
-df = pd.read_csv(WEEKLY_FILE)
+df = load_table(WEEKLY_FILE)
 
 # Try to detect the time column: 'week' or 'date'
 if 'week' in df.columns:
     time_col = 'week'
-    df['week'] = pd.to_datetime(df['week'])
 elif 'date' in df.columns:
     time_col = 'date'
-    df['date'] = pd.to_datetime(df['date'])
 else:
     raise ValueError("Need a 'week' or 'date' column in clean_weekly_MEAN_latest.csv")
 
@@ -31,7 +30,7 @@ df = df.dropna(subset=['continent'])
 
 # Aggregate to continent x week (mean of all countries in that continent)
 weekly_cont = (
-    df.groupby(['continent', time_col], as_index=False)
+    df.groupby(['continent', time_col], as_index=False, observed=True)
       .agg({
           'new_cases_per_100k': 'mean',
           'pfv_per_hundred': 'mean'
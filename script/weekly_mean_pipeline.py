@@ -1,31 +1,27 @@
 import os
-import pandas as pd
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
+from robustpca.resample import MEAN_RULES, resample
+from robustpca.tables import load_table
+
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
 
 # Input file (your uploaded file)
 INPUT = os.path.join(BASE, "clean_weekly_with_100k.csv")
 
-# ----------------- LOAD DATA -----------------
-df = pd.read_csv(INPUT, parse_dates=["date"])
-df = df.sort_values("date")
+# bucket size ("D", "W" or "M") and the weekday weeks start on
+FREQ = "W"
+WEEK_ANCHOR = "MON"
 
-# Ensure numeric
-df["new_cases_per_100k"] = pd.to_numeric(df["new_cases_per_100k"], errors="coerce")
-df["pfv_per_hundred"]    = pd.to_numeric(df["pfv_per_hundred"], errors="coerce")
-df["population"]         = pd.to_numeric(df["population"], errors="coerce")
+# ----------------- LOAD DATA -----------------
+# typed through the columnar cache (dates parsed, numeric columns coerced)
+df = load_table(INPUT)
+# one fixed row order (countries within a day), so "last" picks the same
+# row here and in incremental updates (run_incremental_update.py)
+df = df.sort_values(["date", "country"], kind="stable")
 
 # ----------------- WEEKLY MEAN -----------------
-df["week"] = df["date"].dt.to_period("W").apply(lambda r: r.start_time)
-
-weekly_mean = (
-    df.groupby(["continent", "who_region", "country", "week"], as_index=False)
-      .agg({
-          "new_cases_per_100k": "mean",
-          "pfv_per_hundred": "mean",
-          "population": "mean"
-      })
-)
+weekly_mean = resample(df, ["continent", "who_region", "country"], MEAN_RULES,
+                       freq=FREQ, anchor=WEEK_ANCHOR)
 
 OUT = os.path.join(BASE, "clean_weekly_MEAN_latest.csv")
 weekly_mean.to_csv(OUT, index=False)
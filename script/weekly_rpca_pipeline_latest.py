@@ -1,91 +1,36 @@
 import os
-import numpy as np
-import pandas as pd
 
-BASE = r"C:/Users/dipac/Downloads/covid-vax-project"
-INPUT = os.path.join(BASE, "clean_weekly_with_100k.csv")
-
-# ===================== RPCA FUNCTIONS =====================
-
-def shrink(X, tau):
-    return np.sign(X) * np.maximum(np.abs(X) - tau, 0.0)
-
-def svt(X, tau):
-    U, s, Vt = np.linalg.svd(X, full_matrices=False)
-    s_thr = np.maximum(s - tau, 0.0)
-    return (U * s_thr) @ Vt
-
-def robust_pca(M, lam=None, mu=None, max_iter=2000, tol=1e-7, rho=1.5):
-    """
-    Solve:  min ||L||_* + lam ||S||_1  s.t.  M = L + S
-    via IALM. Returns (L, S).
-    """
-    m, n = M.shape
-    if lam is None:
-        lam = 1.0 / np.sqrt(max(m, n))   # standard default
-
-    norm_two = np.linalg.norm(M, 2)
-    norm_inf = np.linalg.norm(M, np.inf) / lam
-    dual_norm = max(norm_two, norm_inf)
-    Y = M / (dual_norm + 1e-12)
-
-    if mu is None:
-        mu = 1.25 / (norm_two + 1e-12)
-    mu_bar = mu * 1e7
-
-    L = np.zeros_like(M)
-    S = np.zeros_like(M)
-
-    M_fro = np.linalg.norm(M, 'fro') + 1e-12
-
-    for it in range(max_iter):
-        # L-update (nuclear norm via SVT)
-        L = svt(M - S + (1.0/mu) * Y, 1.0/mu)
+from robustpca.decomposition_io import save_decomposition
+from robustpca.resample import SUM_RULES, resample
+from robustpca.stage_cache import StageCache
+from robustpca.tables import load_table
 
-        # S-update (elementwise soft-threshold)
-        S = shrink(M - L + (1.0/mu) * Y, lam/mu)
-
-        # residual and dual update
-        R = M - L - S
-        Y = Y + mu * R
-
-        err = np.linalg.norm(R, 'fro') / M_fro
-        if it % 50 == 0:
-            print(f"iter {it}: err = {err:.3e}")
-        if err < tol:
-            print(f"Converged at iter {it}, err = {err:.3e}")
-            break
+BASE = os.environ.get("COVID_VAX_BASE", r"C:/Users/dipac/Downloads/covid-vax-project")
+INPUT = os.path.join(BASE, "clean_weekly_with_100k.csv")
+# also write the old *_matrix / *_lowrank / *_sparse CSVs
+EXPORT_CSV = False
 
-        mu = min(mu * rho, mu_bar)
+# pivots and decompositions shared with the other pipeline scripts
+CACHE = StageCache(os.path.join(BASE, ".stage_cache"))
 
-    return L, S
+# bucket size ("D", "W" or "M") and the weekday weeks start on
+FREQ = "W"
+WEEK_ANCHOR = "MON"
 
 # ===================== LOAD DATA =====================
 
-df = pd.read_csv(INPUT, parse_dates=["date"])
-df = df.sort_values("date")
-
-# Ensure numeric
-df["new_cases_per_100k"] = pd.to_numeric(df["new_cases_per_100k"], errors="coerce")
-df["pfv_per_hundred"]    = pd.to_numeric(df["pfv_per_hundred"],    errors="coerce")
-df["population"]         = pd.to_numeric(df["population"],         errors="coerce")
+# typed through the columnar cache (dates parsed, numeric columns coerced)
+df = load_table(INPUT)
+# one fixed row order (countries within a day), so "last" picks the same
+# row here and in incremental updates (run_incremental_update.py)
+df = df.sort_values(["date", "country"], kind="stable")
 
 # ===================== WEEKLY AGGREGATION =====================
 
-# week start (Monday by default)
-df["week"] = df["date"].dt.to_period("W").apply(lambda r: r.start_time)
-
-# For each continent + who_region + week:
+# For each continent + who_region + week (starting on WEEK_ANCHOR):
 # - sum new_cases_per_100k over the week
 # - take the LAST weekly value of pfv_per_hundred and population
-weekly = (
-    df.groupby(["continent", "who_region", "week"], as_index=False)
-      .agg({
-          "new_cases_per_100k": "sum",   # weekly sum of new cases
-          "pfv_per_hundred":    "last",  # latest cumulative % that week
-          "population":         "last"   # latest population estimate that week
-      })
-)
+weekly = resample(df, ["continent", "who_region"], SUM_RULES, freq=FREQ, anchor=WEEK_ANCHOR)
 
 weekly_path = os.path.join(BASE, "clean_weekly_SUM_latest.csv")
 weekly.to_csv(weekly_path, index=False)
@@ -93,57 +38,49 @@ print("Saved weekly aggregated file:", weekly_path)
 
 # ===================== RPCA RUNNER =====================
 
-def run_rpca_and_save(df_weekly, group_col, prefix):
+def build_matrices(df_weekly, group_cols):
+    # Pivot to matrices: rows = weeks, columns = group (e.g., continents),
+    # all group columns in one pass;
+    # gaps stay NaN, the solvers mask them out instead of fitting fake zero-case days
+    # (sum across WHO regions (or continents) in the same week)
+    return CACHE.pivots(df_weekly, "week", list(group_cols), "new_cases_per_100k", aggfunc="sum")
+
+def run_rpca_and_save(df_weekly, groups):
     """
     df_weekly: aggregated weekly dataframe
-    group_col: 'continent' or 'who_region'
-    prefix: filename prefix
-    """
-    # Pivot to matrix: rows = weeks, columns = group (e.g., continents)
-    mat = (
-    df_weekly.pivot_table(
-        index="week",
-        columns=group_col,
-        values="new_cases_per_100k",
-        aggfunc="sum"     # sum across WHO regions (or continents) in same week
-    )
-    .sort_index()
-    .fillna(0.0)
-)
-
-    
-
-    M = mat.values.astype(float)
+    groups: {group_col: filename prefix}, e.g. {'continent': 'rpca_continent_cases'}
 
-    print(f"\n=== Running RPCA for {group_col} ===")
-    print("Matrix shape:", M.shape)
+    All group matrices go through one batched PCP run (see solve_many),
+    skipping the ones already in the stage cache.
+    """
+    mats = build_matrices(df_weekly, groups)
 
-    L, S = robust_pca(M)
+    print(f"\n=== Running RPCA for {', '.join(groups)} ===")
+    for g, mat in mats.items():
+        print(f"Matrix shape ({g}):", mat.shape)
 
-    # Back to DataFrames
-    L_df = pd.DataFrame(L, index=mat.index, columns=mat.columns)
-    S_df = pd.DataFrame(S, index=mat.index, columns=mat.columns)
+    results = CACHE.decompose_many([mat.values.astype(float) for mat in mats.values()],
+                                   "pcp", max_iter=2000, verbose=True)
 
-    # Save matrix + components
-    mat_path = os.path.join(BASE, f"{prefix}_matrix.csv")
-    low_path = os.path.join(BASE, f"{prefix}_lowrank.csv")
-    spr_path = os.path.join(BASE, f"{prefix}_sparse.csv")
+    for (g, mat), res in zip(mats.items(), results):
+        prefix = groups[g]
+        L, S = res
 
-    mat.to_csv(mat_path)
-    L_df.to_csv(low_path)
-    S_df.to_csv(spr_path)
+        # Save matrix + components (one binary container, labels included)
+        path = save_decomposition(os.path.join(BASE, prefix), mat.values, L, S,
+                                  mat.index, mat.columns,
+                                  meta=dict(solver="pcp", max_iter=2000, aggfunc="sum"),
+                                  export_csv=EXPORT_CSV)
 
-    print("Saved:")
-    print("  ", mat_path)
-    print("  ", low_path)
-    print("  ", spr_path)
+        print("Saved:")
+        print("  ", path)
 
 # ===================== RUN RPCA =====================
 
-# By continent
-run_rpca_and_save(weekly, "continent", "rpca_continent_cases")
-
-# By WHO region
-run_rpca_and_save(weekly, "who_region", "rpca_who_cases")
+# By continent and by WHO region
+run_rpca_and_save(weekly, {
+    "continent":  "rpca_continent_cases",
+    "who_region": "rpca_who_cases",
+})
 
 print("\n✅ Done: weekly SUM/latest aggregation + RPCA (default λ).")
@@ -0,0 +1,130 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .ircur import IRCUR
+from .sweep import SOLVERS
+
+
+def window_bounds(n, length, overlap):
+    """
+    (start, stop) row ranges of the windows over n rows: windows of
+    `length` rows starting every length - overlap rows from row 0, the last
+    one moved back to end at row n. Windows are anchored at the first row,
+    so appending rows only changes the last window (or adds new ones).
+    """
+    if not 0 <= overlap < length:
+        raise ValueError(f"Need 0 <= overlap < length, got overlap={overlap}, length={length}")
+    if n <= length:
+        return [(0, n)]
+    step = length - overlap
+    bounds = []
+    start = 0
+    while start + length < n:
+        bounds.append((start, start + length))
+        start += step
+    bounds.append((n - length, n))
+    return bounds
+
+
+def blend_weights(bounds):
+    """
+    Per-window row weights for stitching: 1 inside a window, ramping down
+    linearly to 0 across its overlap with the previous / next window.
+    """
+    weights = []
+    for i, (start, stop) in enumerate(bounds):
+        pos = np.arange(start, stop) + 0.5
+        w = np.ones(stop - start)
+        if i > 0 and bounds[i - 1][1] > start:
+            w = np.minimum(w, (pos - start) / (bounds[i - 1][1] - start))
+        if i + 1 < len(bounds) and bounds[i + 1][0] < stop:
+            w = np.minimum(w, (stop - pos) / (stop - bounds[i + 1][0]))
+        weights.append(w)
+    return weights
+
+
+def _window_key(W, solver, solver_kwargs):
+    # content hash of one window: its data plus the solver settings
+    h = hashlib.sha1()
+    h.update(repr((W.shape, solver, sorted(solver_kwargs.items()))).encode())
+    h.update(np.ascontiguousarray(W).tobytes())
+    return h.hexdigest()
+
+
+def _solve_window(W, solver, solver_kwargs):
+    if solver == "ircur":
+        kwargs = dict(nr=W.shape[0], nc=W.shape[1], initial_threshold=0.5 * np.nanmax(np.abs(W)),
+                      verbose=False)
+        kwargs.update(solver_kwargs)
+        rank = kwargs.pop("rank", 2)
+        return IRCUR().decompose(W, rank, **kwargs)
+    return SOLVERS[solver](W, **solver_kwargs)
+
+
+def windowed(M, length=365, overlap=90, solver="pcp", n_jobs=None, cache_dir=None,
+             **solver_kwargs):
+    """
+    Sliding-window RPCA: decompose overlapping row windows of M (dates
+    along the rows) independently on a process pool of n_jobs workers
+    (n_jobs=1 runs in this process) and stitch them into one (L, S), with
+    the windows blended linearly across each overlap (see blend_weights).
+    Every window satisfies W = L_w + S_w, so the blend keeps M = L + S up
+    to the solver tolerance, while each window gets its own low-rank
+    structure.
+
+    solver is "pcp", "irls" or "ircur"; remaining keyword arguments go to
+    every window. For IRCUR, rank defaults to 2, nr/nc to the full window
+    and initial_threshold to 0.5 * max|W|.
+
+    With cache_dir set, each window's (L, S) is stored there under a hash
+    of its data and the solver settings, so a rerun on a longer (or
+    revised) matrix only recomputes the windows whose rows changed.
+
+    Returns (L, S).
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}; expected one of {list(SOLVERS)}")
+    M = np.asarray(M, dtype=float)
+    bounds = window_bounds(M.shape[0], length, overlap)
+
+    parts = [None] * len(bounds)
+    paths = [None] * len(bounds)
+    todo = []
+    for i, (start, stop) in enumerate(bounds):
+        if cache_dir is not None:
+            key = _window_key(M[start:stop], solver, solver_kwargs)
+            paths[i] = os.path.join(cache_dir, f"window_{key}.npz")
+            if os.path.exists(paths[i]):
+                with np.load(paths[i]) as f:
+                    parts[i] = f["L"], f["S"]
+                continue
+        todo.append(i)
+
+    tasks = [(M[bounds[i][0]:bounds[i][1]], solver, solver_kwargs) for i in todo]
+    if n_jobs == 1 or len(tasks) <= 1:
+        results = [_solve_window(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_solve_window, *task) for task in tasks]
+            results = [f.result() for f in futures]
+
+    if cache_dir is not None and todo:
+        os.makedirs(cache_dir, exist_ok=True)
+    for i, (L_w, S_w) in zip(todo, results):
+        parts[i] = L_w, S_w
+        if cache_dir is not None:
+            np.savez(paths[i], L=L_w, S=S_w)
+
+    L = np.zeros_like(M)
+    S = np.zeros_like(M)
+    total = np.zeros(M.shape[0])
+    for (start, stop), w, (L_w, S_w) in zip(bounds, blend_weights(bounds), parts):
+        L[start:stop] += w[:, None] * L_w
+        S[start:stop] += w[:, None] * S_w
+        total[start:stop] += w
+    L /= total[:, None]
+    S /= total[:, None]
+    return L, S